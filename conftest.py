@@ -0,0 +1,26 @@
+"""
+Shared pytest fixtures for the BenPak test scripts
+"""
+
+import importlib.util
+import os
+import sys
+
+import pytest
+
+# test_gui.py builds Qt widgets, only collect it when PyQt5 is there
+collect_ignore = [] if importlib.util.find_spec("PyQt5") else ["test_gui.py"]
+
+
+def pytest_configure(config):
+    # Add src directory to path, once for every test module
+    src_dir = os.path.join(os.path.dirname(__file__), 'src')
+    if src_dir not in sys.path:
+        sys.path.insert(0, src_dir)
+
+
+@pytest.fixture(scope="session")
+def pm():
+    """One PackageManager for the whole run (config, package list and shell detection are loaded once)"""
+    from package_manager import PackageManager
+    return PackageManager()
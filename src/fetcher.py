@@ -6,10 +6,15 @@ import re
 import requests
 from bs4 import BeautifulSoup
 from packaging import version
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 import json
 
 
+# Version number in a download file name, e.g. discord-0.0.91.tar.gz
+_VERSION_RE = re.compile(r'(\d+\.\d+\.\d+)')
+
+
 class PackageFetcher:
     def get_gitkraken_info(self) -> Tuple[str, str]:
         """Get GitKraken latest version and direct download URL (tar.gz) by following redirection or parsing page."""
@@ -38,8 +43,12 @@ class PackageFetcher:
         return "latest", url
     """Fetches latest versions and download URLs for packages"""
     
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, session: Optional[requests.Session] = None):
+        # PackageManager passes its pooled session so downloads share connections
+        self.session = session or requests.Session()
+        # URLs whose last lookup failed (network error, server error); their
+        # fallback result must not be cached as if it were the latest version
+        self.failed_urls = set()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
@@ -293,9 +302,25 @@ class PackageFetcher:
     
     def update_package_info(self, package: Dict) -> Dict:
         """Update package with latest version info (générique, basé sur url_pattern du JSON)"""
-        import re
-        version_str = package.get('version', 'latest')
-        url = package.get('url_pattern', '')
+        detected_version, real_url = self._resolve_download_url(package.get('url_pattern', ''))
+        return self._with_latest_info(package, detected_version, real_url)
+    
+    def update_many(self, packages: List[Dict], max_workers: int = 8) -> List[Dict]:
+        """Update several packages concurrently, resolving each distinct URL only once"""
+        if not packages:
+            return []
+        futures = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for package in packages:
+                url = package.get('url_pattern', '')
+                if url not in futures:
+                    futures[url] = executor.submit(self._resolve_download_url, url)
+            return [self._with_latest_info(package, *futures[package.get('url_pattern', '')].result())
+                    for package in packages]
+    
+    def _resolve_download_url(self, url: str) -> Tuple[Optional[str], str]:
+        """Follow the download URL and return (version found in the file name or None, real URL)"""
+        version_str = None
         real_url = url
         
         # 1. On tente de détecter la version via redirection ou nom de fichier
@@ -303,6 +328,11 @@ class PackageFetcher:
             # Essayer HEAD d'abord pour suivre les redirections
             resp = self.session.head(url, allow_redirects=False)
             
+            if resp.status_code >= 500:
+                self.failed_urls.add(url)
+                return version_str, real_url
+            self.failed_urls.discard(url)
+            
             if resp.status_code == 302:
                 # Redirection - récupérer l'URL finale
                 redirect_url = resp.headers.get('Location', '')
@@ -310,7 +340,7 @@ class PackageFetcher:
                     real_url = redirect_url
                     filename = redirect_url.split('/')[-1]
                     # Ex: discord-0.0.XX.tar.gz
-                    version_match = re.search(r'(\d+\.\d+\.\d+)', filename)
+                    version_match = _VERSION_RE.search(filename)
                     if version_match:
                         version_str = version_match.group(1)
             elif resp.status_code == 200:
@@ -319,17 +349,21 @@ class PackageFetcher:
                 if resp_full.url != url:
                     real_url = resp_full.url
                     filename = real_url.split('/')[-1]
-                    version_match = re.search(r'(\d+\.\d+\.\d+)', filename)
+                    version_match = _VERSION_RE.search(filename)
                     if version_match:
                         version_str = version_match.group(1)
                         
         except Exception as e:
-            pass
-            
+            self.failed_urls.add(url)
+        
+        return version_str, real_url
+    
+    def _with_latest_info(self, package: Dict, detected_version: Optional[str], real_url: str) -> Dict:
+        """Copy of package with latest_version / real_download_url filled in"""
         # fallback: si pas de version trouvée, on garde 'latest' ou ce qui est dans le JSON
         updated_package = package.copy()
-        updated_package['latest_version'] = version_str
-        updated_package['url_pattern'] = url
+        updated_package['latest_version'] = detected_version or package.get('version', 'latest')
+        updated_package['url_pattern'] = package.get('url_pattern', '')
         updated_package['real_download_url'] = real_url
         
         return updated_package
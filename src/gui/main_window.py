@@ -730,7 +730,7 @@ class MainWindow(QMainWindow):
         self.log_event("[ACTION] Checking for updates...")
         try:
             installed_packages = {}
-            packages = self.package_manager.get_available_packages()
+            packages = self.package_manager.get_available_packages(force_refresh=True)
             package_dict = self.package_manager.get_package_dict()
             
             for package in packages:
@@ -2,33 +2,224 @@
 Package Manager - Core functionality for downloading and installing packages
 """
 
+import ctypes
+import hashlib
 import os
+import re
 import subprocess
 import tempfile
 import shutil
+import signal
+import stat
+import tarfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
-import requests
-from packaging import version
 import json
-from config import Config
-from fetcher import PackageFetcher
 import sys
+from config import Config
+
+try:
+    # Optional faster JSON parser for the package configs
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Version number embedded in a downloaded file name, e.g. discord-0.0.91.tar.gz
+_VERSION_RE = re.compile(r'(\d+\.\d+\.\d+)')
+
+# ~/.local/bin already exported by a shell config, written with ~ or $HOME
+_LOCAL_BIN_RE = re.compile(r'(?:~|\$HOME)/\.local/bin')
+
+# File name in a Content-Disposition header
+_FILENAME_RE = re.compile(r'filename="?([^";]+)"?')
+
+# Read size for HTTP downloads; 8 KiB chunks cost a Python iteration per
+# recv on fast links
+_DOWNLOAD_CHUNK_SIZE = 128 * 1024
+
+# How long (seconds) a resolved latest version is reused before asking the
+# download server again
+_PACKAGE_INFO_TTL = 5 * 60
+
+# Downloads bigger than this are split into parallel range requests when the
+# server supports it
+_RANGED_DOWNLOAD_MIN_SIZE = 16 * 1024 * 1024
+_RANGED_DOWNLOAD_PARTS = 4
+
+# tarfile open modes for each archive-based extract_method
+_TAR_MODES = {
+    "tar_gz": "r|gz",
+    "tar_bz2": "r|bz2",
+    "tar_xz": "r|xz",
+}
+
+# Members are checked by _filter_tar_member before extraction; on Pythons that
+# have extraction filters, tell tarfile not to filter them a second time
+_TAR_EXTRACT_KWARGS = {"filter": "fully_trusted"} if hasattr(tarfile, "tar_filter") else {}
+
+
+
+def _without_dot_slash(name: str) -> str:
+    """Archive member name without its leading "./" (str.removeprefix is 3.9+)"""
+    return name[2:] if name.startswith("./") else name
+
+
+def _filter_tar_member(member: tarfile.TarInfo, dest_path: str) -> tarfile.TarInfo:
+    """Same safety rules as GNU tar: no absolute paths and nothing written outside
+    dest_path (the realpath of the target dir), including through symlinks.
+    
+    Symlinks may point anywhere, some packages ship absolute ones, but hard link
+    targets must stay inside the archive. Uses tarfile's "tar" filter where it
+    exists and the same checks by hand on older Pythons.
+    """
+    if hasattr(tarfile, "tar_filter"):
+        member = tarfile.tar_filter(member, dest_path)
+    else:
+        name = member.name.lstrip("/")
+        target_path = os.path.realpath(os.path.join(dest_path, name))
+        if os.path.commonpath([target_path, dest_path]) != dest_path:
+            raise Exception(f"archive member {member.name!r} is outside the destination")
+        member.name = name
+        # No setuid/setgid bits, no group/other write
+        if member.mode is not None:
+            member.mode &= 0o755
+    if member.islnk():
+        link_path = os.path.realpath(os.path.join(dest_path, member.linkname))
+        if (os.path.isabs(member.linkname) or ".." in member.linkname.split("/")
+                or os.path.commonpath([link_path, dest_path]) != dest_path):
+            raise Exception(f"archive member {member.name!r} links outside the destination")
+    return member
 
-from fetcher import PackageFetcher
-import sys
+
+# Leading bytes of each archive type, checked on the first downloaded chunk
+_MAGIC = {
+    "tar_gz": b"\x1f\x8b",
+    "tar_bz2": b"BZh",
+    "tar_xz": b"\xfd7zXZ\x00",
+    "deb": b"!<arch>\n",
+}
+
+
+# How long (seconds) a process table snapshot is reused
+_PROCESS_SNAPSHOT_TTL = 0.5
+
+# Extra launch candidates (relative to the install dir) for packages whose
+# executable name differs from the config. Ne jamais inclure /usr/bin/code pour VSCode BenPak !
+_LAUNCH_CANDIDATES = {
+    "vscode": ("bin/code", "code"),
+    "discord": ("Discord", "discord"),
+}
+
+# Directories never searched for executables
+_EXEC_SEARCH_SKIP_DIRS = frozenset({".git", "man", "locale"})
+
+# Files that are never the application executable
+_NON_EXEC_SUFFIXES = ('.desktop', '.txt', '.md', '.log')
+
+# Helper tools shipped next to the main executable, e.g. code-tunnel
+_HELPER_EXEC_RE = re.compile(r'-(tunnel|cli|helper)')
+
+# Compiled "# BenPak - <id>" + PATH export blocks, by package id
+_BENPAK_BLOCK_RE_CACHE: Dict[str, "re.Pattern"] = {}
+
+
+def _benpak_block_re(package_id: str) -> "re.Pattern":
+    """Regex matching the PATH block _add_app_path_to_shell_config writes for a package"""
+    pattern = _BENPAK_BLOCK_RE_CACHE.get(package_id)
+    if pattern is None:
+        pattern = re.compile(
+            # The blank line written before the block goes with it
+            rf'(?:^[ \t]*\n)?^[ \t]*# BenPak - {re.escape(package_id)}[ \t]*(?:\n|$)'
+            rf'(?:[ \t]*(?:export PATH=|set -gx PATH )[^\n]*(?:\n|$))?',
+            re.MULTILINE)
+        _BENPAK_BLOCK_RE_CACHE[package_id] = pattern
+    return pattern
+
+
+# psutil is only needed to look at processes; imported on first use
+_psutil = None
+
+
+def _get_psutil():
+    """Import psutil once and return the module"""
+    global _psutil
+    if _psutil is None:
+        import psutil
+        _psutil = psutil
+    return _psutil
+
+
+class UnsupportedArchiveError(Exception):
+    """Archive uses a format the in-process extractor can't read"""
+
+
+class _LimitedReader:
+    """Read-only view of the next `size` bytes of a sequential stream"""
+    
+    def __init__(self, fileobj, size: int):
+        self._fileobj = fileobj
+        self.remaining = size
+    
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self._fileobj.read(size) if size else b""
+        self.remaining -= len(data)
+        return data
+    
+    def skip_rest(self):
+        while self.remaining and self.read(1024 * 1024):
+            pass
 
 
 class PackageManager:
     def __init__(self, install_dir: str = None):
         """Initialize package manager with installation directory"""
         self.config = Config()
-        self.fetcher = PackageFetcher()
+        packages_cache = self.config.load_packages_cache()
+        
+        # The HTTP session and the fetcher are created on first network access,
+        # importing requests is a noticeable part of startup
+        self._session = None
+        self._fetcher = None
+        self._http_lock = threading.Lock()
+        
+        # Set once ~/.local/bin is known to be on PATH or in the shell configs
+        self._path_checked = False
+        # Shell detection doesn't change while BenPak runs
+        self._current_shell = None
+        self._shell_configs_cache = {}
+        # Last process table snapshot: (taken_at, [(process, info)])
+        self._proc_cache: Optional[Tuple[float, List]] = None
+        # Executable names per package dir: {package_dir: ((st_ino, st_mtime_ns), names)}
+        self._exe_name_cache: Dict[str, Tuple[Tuple[int, int], set]] = {}
         
         install_path = install_dir or self.config.get("install_directory")
         self.install_dir = Path(install_path)
         self.install_dir.mkdir(exist_ok=True)
         
+        # Single index of installed packages (version, install date, executable)
+        # so refreshes don't have to open every package's .version file
+        self.index_file = self.install_dir / "index.json"
+        self._index_cache = None  # (mtime_ns, data)
+        self._version_cache: Dict[str, str] = {}
+        # Parsed package configs by path: (mtime, config)
+        self._json_cache: Dict[str, Tuple[float, Dict]] = {}
+        # Packages with resolved latest version by config file name:
+        # (mtime, fetched_at, package, sha1 of the config), persisted in the
+        # packages cache so a restart doesn't re-query every server
+        self._pkg_cache: Dict[str, Tuple[float, float, Dict, str]] = {
+            name: (entry["mtime"], entry["checked_at"], entry["package"], entry["sha1"])
+            for name, entry in packages_cache.get("packages", {}).items()
+            if isinstance(entry, dict) and {"mtime", "checked_at", "package", "sha1"} <= entry.keys()
+        }
+        
         # Déterminer le chemin de base pour les ressources (comme packages/configs)
         if getattr(sys, 'frozen', False):
             # On est dans un bundle PyInstaller
@@ -48,25 +239,132 @@ class PackageManager:
         else:
             self.packages_config_dir = bundled_packages_dir
         
-    def get_available_packages(self) -> List[Dict]:
-        """Get list of available packages from config files (et retourne aussi un dict par id)"""
-        packages = []
-        self._package_dict = {}
-        # Load packages from JSON configuration files
-        if self.packages_config_dir.exists():
-            for config_file in self.packages_config_dir.glob("*.json"):
-                try:
-                    with open(config_file, 'r') as f:
-                        package_config = json.load(f)
-                        updated_package = self.fetcher.update_package_info(package_config)
-                        packages.append(updated_package)
-                        self._package_dict[updated_package['id']] = updated_package
-                except Exception as e:
-                    print(f"Error loading package config {config_file}: {e}")
-        else:
-            print(f"Warning: Package config directory not found: {self.packages_config_dir}")
+    @property
+    def session(self):
+        """Pooled session for metadata lookups and downloads, so repeated
+        requests to the same host reuse the TCP/TLS connection"""
+        if self._session is None:
+            with self._http_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    from urllib3.util.retry import Retry
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16,
+                                          max_retries=Retry(total=3, backoff_factor=0.3))
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+    
+    @property
+    def fetcher(self):
+        """PackageFetcher sharing the pooled session"""
+        if self._fetcher is None:
+            session = self.session
+            with self._http_lock:
+                if self._fetcher is None:
+                    from fetcher import PackageFetcher
+                    self._fetcher = PackageFetcher(session=session)
+        return self._fetcher
+    
+    def get_available_packages(self, force_refresh: bool = False) -> List[Dict]:
+        """Get list of available packages from config files (et retourne aussi un dict par id).
+        
+        Latest-version lookups are reused for _PACKAGE_INFO_TTL seconds unless
+        force_refresh is set or the config file changed.
+        """
+        packages = self._resolve_packages(self._scan_package_configs(), force_refresh)
+        self._package_dict = {package['id']: package for package in packages}
         return packages
 
+    def _scan_package_configs(self) -> List[Tuple[str, float]]:
+        """List (path, mtime) of the package JSON configs"""
+        if not self.packages_config_dir.exists():
+            print(f"Warning: Package config directory not found: {self.packages_config_dir}")
+            return []
+        with os.scandir(self.packages_config_dir) as entries:
+            return [(entry.path, entry.stat().st_mtime)
+                    for entry in entries if entry.name.endswith(".json")]
+
+    def _resolve_packages(self, config_files: List[Tuple[str, float]], force_refresh: bool = False) -> List[Dict]:
+        """Load configs and resolve their latest versions, only asking the network for stale ones"""
+        resolved = {}
+        stale = []
+        now = time.time()
+        for config_file, mtime in config_files:
+            cached = None if force_refresh else self._get_cached_package(config_file, mtime)
+            if cached and 0 <= now - cached[1] < _PACKAGE_INFO_TTL:
+                resolved[config_file] = cached[2]
+                continue
+            try:
+                stale.append((config_file, mtime, self._load_package_config(config_file, mtime)))
+            except Exception as e:
+                print(f"Error loading package config {config_file}: {e}")
+        if stale:
+            # Latest-version lookups run concurrently, one request per distinct URL
+            updated_packages = self.fetcher.update_many([package_config for _, _, package_config in stale])
+            checked_at = time.time()
+            for (config_file, mtime, _), updated_package in zip(stale, updated_packages):
+                if updated_package.get('url_pattern', '') in self.fetcher.failed_urls:
+                    # Lookup failed (offline, server down): keep the last known
+                    # result if there is one and ask again next time
+                    cached = self._get_cached_package(config_file, mtime)
+                    resolved[config_file] = cached[2] if cached else updated_package
+                    continue
+                self._pkg_cache[os.path.basename(config_file)] = (
+                    mtime, checked_at, updated_package, self._config_sha1(config_file))
+                resolved[config_file] = updated_package
+            self._save_package_cache()
+        return [resolved[config_file] for config_file, _ in config_files if config_file in resolved]
+    
+    def _get_cached_package(self, config_file: str, mtime: float) -> Optional[Tuple[float, float, Dict, str]]:
+        """Cache entry of a config file, if the file didn't change since.
+        
+        Entries are keyed by file name: the onefile build extracts the configs
+        to a new /tmp/_MEIxxxx, with new mtimes, on every launch. When the mtime
+        differs the file's content decides.
+        """
+        name = os.path.basename(config_file)
+        cached = self._pkg_cache.get(name)
+        if not cached:
+            return None
+        if cached[0] != mtime:
+            try:
+                if self._config_sha1(config_file) != cached[3]:
+                    return None
+            except OSError:
+                return None
+            cached = self._pkg_cache[name] = (mtime,) + cached[1:]
+        return cached
+    
+    def _config_sha1(self, config_file: str) -> str:
+        with open(config_file, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    
+    def _save_package_cache(self):
+        """Persist resolved package info through Config's packages cache, dropping
+        entries of configs that no longer exist"""
+        current = {os.path.basename(config_file) for config_file, _ in self._scan_package_configs()}
+        self.config.save_packages_cache({
+            "packages": {
+                name: {"mtime": mtime, "checked_at": checked_at, "package": package, "sha1": sha1}
+                for name, (mtime, checked_at, package, sha1) in self._pkg_cache.items()
+                if name in current
+            }
+        })
+    
+    def _load_package_config(self, config_file: str, mtime: float) -> Dict:
+        """Parse a package config, reusing the previous result while its mtime is unchanged"""
+        cached = self._json_cache.get(config_file)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(config_file, 'rb') as f:
+            data = f.read()
+        package_config = orjson.loads(data) if orjson else json.loads(data)
+        self._json_cache[config_file] = (mtime, package_config)
+        return package_config
+    
     def get_package_dict(self) -> Dict[str, Dict]:
         """Retourne un dict {id: package} pour accès rapide"""
         if hasattr(self, '_package_dict'):
@@ -76,137 +374,315 @@ class PackageManager:
     
     def is_package_installed(self, package_id: str) -> bool:
         """Check if a package is already installed"""
-        package_dir = self.install_dir / package_id
-        return package_dir.exists() and any(package_dir.iterdir())
+        return self._dir_has_entries(self.install_dir / package_id)
+    
+    def _dir_has_entries(self, path) -> bool:
+        """Check that a directory exists and is not empty, reading at most one entry"""
+        try:
+            with os.scandir(path) as it:
+                return next(it, None) is not None
+        except (FileNotFoundError, NotADirectoryError):
+            return False
     
     def get_installed_version(self, package_id: str) -> Optional[str]:
         """Get version of installed package if available"""
-        version_file = self.install_dir / package_id / ".version"
-        if version_file.exists():
+        # "" marks a package known to have no version
+        cached = self._version_cache.get(package_id)
+        if cached is not None:
+            return cached or None
+        
+        index = self._load_install_index()
+        if index and package_id in index:
+            version_str = index[package_id].get("version") or ""
+        else:
+            # Packages installed before the index existed
             try:
-                return version_file.read_text().strip()
-            except:
-                pass
+                with open(self.install_dir / package_id / ".version", 'rb') as f:
+                    version_str = f.read(64).decode('ascii', 'ignore').strip()
+            except OSError:
+                version_str = ""
+        self._version_cache[package_id] = version_str
+        return version_str or None
+    
+    def _load_install_index(self) -> Optional[Dict[str, Dict]]:
+        """Load the install index, reusing the parsed copy while the file is unchanged"""
+        try:
+            mtime_ns = os.stat(self.index_file).st_mtime_ns
+        except OSError:
+            return None
+        if self._index_cache and self._index_cache[0] == mtime_ns:
+            return self._index_cache[1]
+        try:
+            with open(self.index_file, 'r') as f:
+                index = json.load(f)
+        except Exception as e:
+            print(f"Error loading install index: {e}")
+            return None
+        self._index_cache = (mtime_ns, index)
+        return index
+    
+    def _update_install_index(self, package_id: str, fields: Optional[Dict], replace: bool = False):
+        """Merge fields into a package's index entry (replace it, or drop it when fields is None)"""
+        try:
+            index = dict(self._load_install_index() or {})
+            if fields is None:
+                if index.pop(package_id, None) is None:
+                    return
+            elif replace or package_id not in index:
+                index[package_id] = fields
+            else:
+                index[package_id] = {**index[package_id], **fields}
+            
+            # Write a sibling file and swap it in so readers never see a partial index
+            tmp_file = self.index_file.with_name(self.index_file.name + ".tmp")
+            with open(tmp_file, 'w') as f:
+                json.dump(index, f, indent=2)
+            os.replace(tmp_file, self.index_file)
+            self._index_cache = (os.stat(self.index_file).st_mtime_ns, index)
+        except Exception as e:
+            print(f"Error updating install index: {e}")
+    
+    def _get_indexed_executable(self, package_id: str) -> Optional[Path]:
+        """Executable recorded in the install index, if it is still there"""
+        entry = (self._load_install_index() or {}).get(package_id) or {}
+        executable_path = entry.get("executable_path")
+        if not executable_path:
+            return None
+        try:
+            st = os.stat(executable_path)
+        except OSError:
+            return None
+        if stat.S_ISREG(st.st_mode) and st.st_mode & 0o111:
+            return Path(executable_path)
         return None
     
     def download_package(self, package: Dict, progress_callback=None) -> str:
         """Download package to temporary directory, using real filename if possible and checking file type."""
-        import re
         url = package["url_pattern"]
         temp_dir = tempfile.mkdtemp()
         filename = f"{package['id']}.{package['type'].split('.')[-1]}"
         temp_file = os.path.join(temp_dir, filename)
         try:
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
-            # Try to get filename from Content-Disposition
-            content_disp = response.headers.get('content-disposition')
-            if content_disp:
-                fname_match = re.search(r'filename="?([^";]+)"?', content_disp)
-                if fname_match:
-                    real_filename = fname_match.group(1)
-                    temp_file = os.path.join(temp_dir, real_filename)
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            with open(temp_file, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if progress_callback and total_size > 0:
-                            progress = int((downloaded / total_size) * 100)
-                            progress_callback(progress)
-            # Vérification du type de fichier téléchargé (pour tar.gz)
-            if package["extract_method"] == "tar_gz":
-                import subprocess
-                try:
-                    file_output = subprocess.check_output(["file", temp_file], text=True)
-                    if "gzip compressed data" not in file_output and "tar archive" not in file_output:
-                        raise Exception(f"Downloaded file is not a valid tar.gz archive: {file_output}")
-                except Exception as e:
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-                    raise Exception(f"Failed to verify archive for {package['name']}: {str(e)}")
+            timeout = (10, self.config.get("download_timeout", 30))
+            ranged_file = None
+            try:
+                ranged_file = self._download_ranged(url, temp_dir, temp_file, timeout, progress_callback)
+            except Exception as e:
+                print(f"[WARN] Parallel download failed, retrying as a single stream: {e}")
+            
+            # Hash (only when there is a checksum to verify) and keep the first
+            # bytes while writing, so checking the file doesn't need a second
+            # read or an external `file` call
+            expected_sha256 = package.get("sha256")
+            hasher = hashlib.sha256() if expected_sha256 else None
+            header = b""
+            if ranged_file:
+                temp_file = ranged_file
+                with open(temp_file, 'rb') as f:
+                    header = f.read(512)
+                    if hasher:
+                        f.seek(0)
+                        for block in iter(lambda: f.read(1024 * 1024), b""):
+                            hasher.update(block)
+            else:
+                response = self.session.get(url, stream=True, timeout=timeout)
+                response.raise_for_status()
+                temp_file = self._download_target(response, temp_dir, temp_file)
+                total_size = int(response.headers.get('content-length', 0))
+                # With a Content-Encoding, Content-Length counts the encoded bytes
+                expected_size = total_size if 'content-encoding' not in response.headers else 0
+                downloaded = 0
+                with open(temp_file, 'wb', buffering=1024 * 1024) as f:
+                    # Reserve the whole file up front when the size is known
+                    if expected_size > 0:
+                        f.truncate(expected_size)
+                    for chunk in response.iter_content(chunk_size=_DOWNLOAD_CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk)
+                            if hasher:
+                                hasher.update(chunk)
+                            if len(header) < 512:
+                                header += chunk[:512 - len(header)]
+                                if len(header) == 512:
+                                    # Stop early when the server sent something else
+                                    self._check_magic(package, header)
+                            downloaded += len(chunk)
+                            if progress_callback and total_size > 0:
+                                progress = int((downloaded / total_size) * 100)
+                                progress_callback(progress)
+                # The file was sized up front, a short read would pass as
+                # complete with zeros at the end
+                if expected_size and downloaded != expected_size:
+                    raise Exception(f"incomplete download: got {downloaded} of {expected_size} bytes")
+            self._check_magic(package, header)
+            if hasher and hasher.hexdigest() != expected_sha256.lower():
+                raise Exception(f"Checksum mismatch for {package['name']}: "
+                                f"expected {expected_sha256}, got {hasher.hexdigest()}")
             return temp_file
         except Exception as e:
             shutil.rmtree(temp_dir, ignore_errors=True)
             raise Exception(f"Failed to download {package['name']}: {str(e)}")
     
-    def extract_package(self, package: Dict, file_path: str, progress_callback=None) -> bool:
-        """Extract package to installation directory"""
+    def _check_magic(self, package: Dict, header: bytes):
+        """Vérification du type de fichier téléchargé d'après ses premiers octets"""
+        method = package["extract_method"]
+        magic = _MAGIC.get(method)
+        if magic is None or header.startswith(magic):
+            return
+        # An uncompressed tar is still accepted for tar.gz, as file(1) did
+        if method == "tar_gz" and header[257:262] == b"ustar":
+            return
+        raise Exception(f"Failed to verify archive for {package['name']}: "
+                        f"Downloaded file is not a valid {package.get('type', method)} archive")
+    
+    def _download_target(self, response, temp_dir: str, default_file: str) -> str:
+        """Use the server's file name from Content-Disposition when there is one"""
+        content_disp = response.headers.get('content-disposition')
+        if content_disp:
+            fname_match = _FILENAME_RE.search(content_disp)
+            if fname_match:
+                # Only the name: the header must not choose where the file goes
+                real_filename = os.path.basename(fname_match.group(1))
+                if real_filename not in ("", ".", ".."):
+                    return os.path.join(temp_dir, real_filename)
+        return default_file
+    
+    def _download_ranged(self, url: str, temp_dir: str, default_file: str, timeout,
+                         progress_callback=None) -> Optional[str]:
+        """Download a large file as parallel HTTP range requests.
+        
+        Returns the downloaded file path, or None when the server doesn't
+        advertise byte ranges or the file is too small to be worth splitting.
+        """
+        head = self.session.head(url, allow_redirects=True, timeout=timeout)
+        if not head.ok:
+            # Some servers refuse HEAD, the plain GET will tell if the URL is bad
+            return None
+        total_size = int(head.headers.get('content-length', 0))
+        if head.headers.get('accept-ranges', '').lower() != 'bytes' or total_size <= _RANGED_DOWNLOAD_MIN_SIZE:
+            return None
+        
+        temp_file = self._download_target(head, temp_dir, default_file)
+        part_size = -(-total_size // _RANGED_DOWNLOAD_PARTS)
+        ranges = [(start, min(start + part_size, total_size) - 1)
+                  for start in range(0, total_size, part_size)]
+        downloaded = 0
+        progress_lock = threading.Lock()
+        
+        fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            try:
+                os.posix_fallocate(fd, 0, total_size)
+            except (AttributeError, OSError):
+                os.ftruncate(fd, total_size)
+            
+            def fetch_range(start: int, end: int):
+                nonlocal downloaded
+                # Follow-up requests go straight to the resolved URL
+                with self.session.get(head.url, headers={'Range': f'bytes={start}-{end}'},
+                                      stream=True, timeout=timeout) as response:
+                    if response.status_code != 206:
+                        raise Exception(f"range request answered with HTTP {response.status_code}")
+                    offset = start
+                    for chunk in response.iter_content(chunk_size=_DOWNLOAD_CHUNK_SIZE):
+                        if not chunk:
+                            continue
+                        # Each part writes at its own offset, no locking needed
+                        os.pwrite(fd, chunk, offset)
+                        offset += len(chunk)
+                        with progress_lock:
+                            downloaded += len(chunk)
+                            if progress_callback:
+                                progress_callback(int((downloaded / total_size) * 100))
+                if offset != end + 1:
+                    raise Exception(f"incomplete range {start}-{end}")
+            
+            with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+                futures = [executor.submit(fetch_range, start, end) for start, end in ranges]
+                for future in futures:
+                    future.result()
+        except Exception:
+            # Don't leave a partial file behind for the single-stream retry
+            os.close(fd)
+            os.unlink(temp_file)
+            raise
+        os.close(fd)
+        return temp_file
+    
+    def extract_package(self, package: Dict, file_path: str, progress_callback=None, fileobj=None,
+                        verify=None) -> bool:
+        """Extract package to installation directory.
+        
+        For tar archives, fileobj can be a stream still being downloaded; file_path
+        is then only the download's file name (used to guess the version).
+        verify is called once the archive is extracted, before the new tree
+        replaces the installed one; it raises to abort the install.
+        """
         package_dir = self.install_dir / package["id"]
+        # Extract next to the current install and swap at the end, so an
+        # upgrade never leaves the package missing or half-deleted. Hidden names
+        # keep these trees out of package listings.
+        staging_dir = self.install_dir / f".{package['id']}.new"
         
         try:
-            # Remove existing installation
-            if package_dir.exists():
-                shutil.rmtree(package_dir)
+            # Leftover from an interrupted install
+            if staging_dir.exists():
+                shutil.rmtree(staging_dir)
             
-            package_dir.mkdir(parents=True, exist_ok=True)
+            staging_dir.mkdir(parents=True)
             
             if progress_callback:
                 progress_callback(10)
             
-            if package["extract_method"] == "tar_gz":
-                # Extract tar.gz file
-                subprocess.run([
-                    "tar", "-xzf", file_path, "-C", str(package_dir), "--strip-components=1"
-                ], check=True)
+            deb_version = None
+            if package["extract_method"] in _TAR_MODES and fileobj is not None:
+                with tarfile.open(fileobj=fileobj, mode=_TAR_MODES[package["extract_method"]]) as tar:
+                    self._extract_tar_members(tar, staging_dir, strip_components=1)
                 
-            elif package["extract_method"] == "tar_bz2":
-                # Extract tar.bz2 file
-                subprocess.run([
-                    "tar", "-xjf", file_path, "-C", str(package_dir), "--strip-components=1"
-                ], check=True)
+            elif package["extract_method"] in _TAR_MODES:
+                self._extract_tar_file(file_path, staging_dir, _TAR_MODES[package["extract_method"]],
+                                       strip_components=1, progress_callback=progress_callback)
                 
-            elif package["extract_method"] == "tar_xz":
-                # Extract tar.xz file
-                subprocess.run([
-                    "tar", "-xJf", file_path, "-C", str(package_dir), "--strip-components=1"
-                ], check=True)
+            elif package["extract_method"] == "deb" and fileobj is not None:
+                deb_version = self._extract_deb_stream(fileobj, staging_dir)
                 
             elif package["extract_method"] == "deb":
-                # Extract deb file using dpkg-deb
-                subprocess.run([
-                    "dpkg-deb", "-x", file_path, str(package_dir)
-                ], check=True)
+                deb_version = self._extract_deb(file_path, staging_dir, progress_callback)
                 
             elif package["extract_method"] == "appimage":
                 # Handle AppImage - just copy and make executable
                 appimage_name = f"{package['id']}.AppImage"
-                target_path = package_dir / appimage_name
-                shutil.copy2(file_path, target_path)
-                os.chmod(target_path, 0o755)
+                target_path = staging_dir / appimage_name
+                self._copy_file(file_path, target_path, 0o755)
                 
                 # Create a wrapper script for easier execution
-                wrapper_script = package_dir / package.get("executable", package["id"])
+                wrapper_script = staging_dir / package.get("executable", package["id"])
                 wrapper_content = f"""#!/bin/bash
 cd "{package_dir}"
 exec ./{appimage_name} "$@"
 """
-                wrapper_script.write_text(wrapper_content)
-                os.chmod(wrapper_script, 0o755)
+                self._write_executable(wrapper_script, wrapper_content)
                 
+            if verify:
+                verify()
+            
             if progress_callback:
                 progress_callback(90)
             
             # Create version file
-            version_file = package_dir / ".version"
+            version_file = staging_dir / ".version"
+            version_str = None
             try:
                 version_str = package.get('latest_version', 'unknown')
                 # Pour les paquets .deb, extraire la version réelle du fichier deb
                 if package["extract_method"] == "deb":
-                    try:
-                        deb_version = subprocess.check_output([
-                            "dpkg-deb", "-f", file_path, "Version"
-                        ], text=True).strip()
-                        if deb_version:
-                            version_str = deb_version
-                    except Exception as e:
-                        print(f"[WARN] Impossible d'extraire la version du .deb: {e}")
+                    if deb_version:
+                        version_str = deb_version
+                    else:
+                        print(f"[WARN] Impossible d'extraire la version du .deb: {file_path}")
                 # fallback si version inconnue
                 if version_str in ['latest', 'unknown']:
-                    import re
-                    from datetime import datetime
-                    version_match = re.search(r'(\d+\.\d+\.\d+)', os.path.basename(file_path))
+                    version_match = _VERSION_RE.search(os.path.basename(file_path))
                     if version_match:
                         version_str = version_match.group(1)
                     else:
@@ -215,45 +691,264 @@ exec ./{appimage_name} "$@"
             except:
                 pass
             
+            # Flush the extracted files once, now that the tree is complete,
+            # rather than per file. A crash before this point can still leave
+            # a partial staging dir, which the next install removes.
+            self._sync_filesystem(staging_dir)
+            
+            # Swap the new tree in; the old one is deleted in the background.
+            # Not a daemon thread: quitting BenPak waits for the delete to finish
+            # instead of leaving a hidden copy of the old version behind
+            if package_dir.exists():
+                # A unique name per update, the previous update's delete may
+                # still be running (rename replaces the empty dir)
+                backup_dir = Path(tempfile.mkdtemp(prefix=f".{package['id']}.old.", dir=self.install_dir))
+                os.rename(package_dir, backup_dir)
+                try:
+                    os.rename(staging_dir, package_dir)
+                except OSError:
+                    # Put the previous version back
+                    os.rename(backup_dir, package_dir)
+                    raise
+                threading.Thread(target=shutil.rmtree, args=(backup_dir,),
+                                 kwargs={'ignore_errors': True}).start()
+            else:
+                os.rename(staging_dir, package_dir)
+            
+            self._update_install_index(package["id"], {
+                "version": version_str,
+                "install_date": time.time()
+            }, replace=True)
+            self._version_cache.pop(package["id"], None)
+            
             if progress_callback:
                 progress_callback(100)
             
             return True
             
         except Exception as e:
-            # Clean up on failure
-            if package_dir.exists():
-                shutil.rmtree(package_dir, ignore_errors=True)
+            # Clean up on failure, the previous installation is left untouched
+            if staging_dir.exists():
+                shutil.rmtree(staging_dir, ignore_errors=True)
+            if isinstance(e, UnsupportedArchiveError):
+                raise
             raise Exception(f"Failed to extract {package['name']}: {str(e)}")
     
+    def _sync_filesystem(self, path: Path):
+        """Best-effort flush of the filesystem holding path (syncfs, or a global sync)"""
+        try:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                libc = ctypes.CDLL(None, use_errno=True)
+                if libc.syncfs(fd) == 0:
+                    return
+            finally:
+                os.close(fd)
+        except (OSError, AttributeError):
+            pass
+        try:
+            os.sync()
+        except OSError:
+            pass
+    
+    def _write_executable(self, path: Path, content: str):
+        """Write a script or .desktop file that is executable from the moment it exists"""
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o755)
+        # The creation mode goes through the umask, fchmod sets it exactly
+        os.fchmod(fd, 0o755)
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+    
+    def _copy_file(self, src: str, dst: Path, mode: int):
+        """Copy a file inside the kernel: copy_file_range (reflink on Btrfs/XFS), then
+        sendfile, then a plain buffered copy where neither is supported"""
+        src_fd = os.open(src, os.O_RDONLY)
+        try:
+            dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+            try:
+                os.fchmod(dst_fd, mode)
+                size = os.fstat(src_fd).st_size
+                offset = 0
+                if hasattr(os, "copy_file_range"):
+                    try:
+                        while offset < size:
+                            copied = os.copy_file_range(src_fd, dst_fd, size - offset)
+                            if copied == 0:
+                                break
+                            offset += copied
+                    except OSError:
+                        # EXDEV on older kernels, or a filesystem without support
+                        pass
+                try:
+                    while offset < size:
+                        sent = os.sendfile(dst_fd, src_fd, offset, size - offset)
+                        if sent == 0:
+                            break
+                        offset += sent
+                except OSError:
+                    os.lseek(src_fd, offset, os.SEEK_SET)
+                    os.lseek(dst_fd, offset, os.SEEK_SET)
+                    with open(src_fd, 'rb', closefd=False) as fsrc, open(dst_fd, 'wb', closefd=False) as fdst:
+                        shutil.copyfileobj(fsrc, fdst, length=1024 * 1024)
+            finally:
+                os.close(dst_fd)
+        finally:
+            os.close(src_fd)
+    
+    def _extract_tar_file(self, file_path: str, target_dir: Path, mode: str,
+                          strip_components: int = 0, progress_callback=None):
+        """Extract a tar archive with tarfile, reporting progress between members"""
+        total_size = os.path.getsize(file_path)
+        with open(file_path, 'rb') as raw:
+            def on_member():
+                if progress_callback and total_size > 0:
+                    progress_callback(10 + int(raw.tell() / total_size * 80))
+            with tarfile.open(fileobj=raw, mode=mode) as tar:
+                self._extract_tar_members(tar, target_dir, strip_components, on_member)
+    
+    def _extract_tar_members(self, tar: tarfile.TarFile, target_dir: Path,
+                             strip_components: int = 0, on_member=None):
+        """Extract members in archive order, like tar --strip-components.
+        
+        Directory permissions and times are set at the end, deepest first, as
+        TarFile.extractall does, so read-only directories can still be filled.
+        """
+        dest_path = os.path.realpath(target_dir)
+        directories = []
+        for member in tar:
+            if strip_components:
+                parts = _without_dot_slash(member.name).split("/")[strip_components:]
+                if not parts or not parts[0]:
+                    continue
+                member.name = "/".join(parts)
+                if member.islnk():
+                    member.linkname = "/".join(_without_dot_slash(member.linkname).split("/")[strip_components:])
+            member = _filter_tar_member(member, dest_path)
+            tar.extract(member, dest_path, set_attrs=not member.isdir(), **_TAR_EXTRACT_KWARGS)
+            if member.isdir():
+                directories.append(member)
+            if on_member:
+                on_member()
+        directories.sort(key=lambda member: member.name, reverse=True)
+        for member in directories:
+            dir_path = os.path.join(dest_path, member.name)
+            try:
+                tar.chown(member, dir_path, False)
+                tar.utime(member, dir_path)
+                tar.chmod(member, dir_path)
+            except tarfile.ExtractError as e:
+                print(f"[WARN] {e}")
+    
+    def _iter_ar_members(self, fileobj):
+        """Yield (name, reader) for each member of an ar archive (the .deb container).
+        
+        Only reads forward, so fileobj can be a pipe. Whatever the caller leaves
+        unread of a member is skipped before the next one.
+        """
+        if fileobj.read(8) != b"!<arch>\n":
+            raise Exception("not an ar archive")
+        while True:
+            header = fileobj.read(60)
+            if len(header) < 60:
+                return
+            name = header[:16].decode("ascii", "ignore").strip().rstrip("/")
+            size = int(header[48:58].decode("ascii").strip())
+            # Members are padded to an even offset
+            reader = _LimitedReader(fileobj, size + (size % 2))
+            yield name, _LimitedReader(reader, size)
+            reader.skip_rest()
+    
+    def _extract_deb(self, file_path: str, target_dir: Path, progress_callback=None) -> Optional[str]:
+        """Extract the data part of a .deb file and return its control Version"""
+        total_size = os.path.getsize(file_path)
+        with open(file_path, 'rb') as raw:
+            def on_member():
+                if progress_callback and total_size > 0:
+                    progress_callback(10 + int(raw.tell() / total_size * 80))
+            try:
+                return self._extract_deb_stream(raw, target_dir, on_member)
+            except UnsupportedArchiveError:
+                # tarfile can't read this one (e.g. zstd), let dpkg-deb do it
+                shutil.rmtree(target_dir, ignore_errors=True)
+                target_dir.mkdir(parents=True)
+                return self._extract_deb_with_dpkg(file_path, target_dir)
+    
+    def _extract_deb_stream(self, fileobj, target_dir: Path, on_member=None) -> Optional[str]:
+        """Extract the data part of a .deb read sequentially from fileobj, return its Version"""
+        deb_version = None
+        for name, member_file in self._iter_ar_members(fileobj):
+            compression = name.rsplit(".", 1)[-1]
+            if compression not in ("tar", "gz", "xz", "bz2"):
+                if name.startswith(("control.tar", "data.tar")):
+                    raise UnsupportedArchiveError(f"unsupported .deb member {name}")
+                continue
+            if name.startswith("control.tar"):
+                with tarfile.open(fileobj=member_file, mode="r|*") as tar:
+                    for member in tar:
+                        if _without_dot_slash(member.name) == "control":
+                            control = tar.extractfile(member).read().decode("utf-8", "replace")
+                            for line in control.splitlines():
+                                if line.startswith("Version:"):
+                                    deb_version = line.split(":", 1)[1].strip()
+                            break
+            elif name.startswith("data.tar"):
+                with tarfile.open(fileobj=member_file, mode="r|*") as tar:
+                    self._extract_tar_members(tar, target_dir, on_member=on_member)
+                return deb_version
+        raise Exception("no data archive found in .deb")
+    
+    def _extract_deb_with_dpkg(self, file_path: str, target_dir: Path) -> Optional[str]:
+        """Fallback .deb extraction for compressions tarfile doesn't support"""
+        self._spawn_and_wait([
+            "dpkg-deb", "-x", file_path, str(target_dir)
+        ])
+        try:
+            return self._spawn_and_wait([
+                "dpkg-deb", "-f", file_path, "Version"
+            ]).strip() or None
+        except Exception:
+            return None
+    
+    def _spawn_and_wait(self, args: List[str]) -> str:
+        """Run a helper command with posix_spawn and return its stdout.
+        
+        Unlike fork+exec this does not copy the page tables of the (possibly
+        large) GUI process. Python 3.7 has no posix_spawnp, subprocess is used there.
+        """
+        if not hasattr(os, "posix_spawnp"):
+            result = subprocess.run(args, stdout=subprocess.PIPE)
+            if result.returncode != 0:
+                raise Exception(f"{args[0]} exited with status {result.returncode}")
+            return result.stdout.decode("utf-8", "replace")
+        read_fd, write_fd = os.pipe()
+        try:
+            pid = os.posix_spawnp(args[0], args, os.environ, file_actions=[
+                (os.POSIX_SPAWN_DUP2, write_fd, 1),
+                (os.POSIX_SPAWN_CLOSE, read_fd),
+            ])
+        except Exception:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+        with os.fdopen(read_fd, 'rb') as output:
+            stdout = output.read()
+        _, status = os.waitpid(pid, 0)
+        # os.waitstatus_to_exitcode is 3.9+
+        exit_code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        if exit_code != 0:
+            raise Exception(f"{args[0]} exited with status {exit_code}")
+        return stdout.decode("utf-8", "replace")
+    
     def install_package(self, package: Dict, progress_callback=None) -> bool:
         """Download and install a package, then create desktop shortcut"""
         try:
             if progress_callback:
                 progress_callback(0, "Downloading...")
 
-            # Download package
-            file_path = self.download_package(package, 
-                lambda p: progress_callback(p * 0.7) if progress_callback else None)
-
-            if progress_callback:
-                progress_callback(70, "Extracting...")
-
-            # Extract package
-            success = self.extract_package(package, file_path,
-                lambda p: progress_callback(70 + p * 0.3) if progress_callback else None)
-
-            # Clean up temporary file
-            os.unlink(file_path)
-            os.rmdir(os.path.dirname(file_path))
+            success = self.download_and_extract(package, progress_callback)
 
-            # Create desktop shortcut if enabled in config
-            if self.config.get("create_desktop_shortcuts", True):
-                self.create_desktop_shortcut(package)
-            
-            # Create PATH symlink if enabled in config  
-            if self.config.get("create_path_symlinks", True):
-                self.create_path_symlink(package)
+            self._create_launchers(package)
 
             if progress_callback:
                 progress_callback(100, "Completed!")
@@ -265,8 +960,145 @@ exec ./{appimage_name} "$@"
                 progress_callback(0, f"Error: {str(e)}")
             raise e
     
-    def uninstall_package(self, package_id: str, force_kill: bool = False) -> bool:
-        """Uninstall a package, with option to kill running processes"""
+    def download_and_extract(self, package: Dict, progress_callback=None) -> bool:
+        """Download a package and extract it into the install directory.
+        
+        tar and .deb archives are extracted while they download. A temp file is
+        only used for AppImages, zstd .debs and packages with a sha256 to verify.
+        """
+        success = None
+        # Archives are extracted while they download, unless a checksum has
+        # to be verified before anything is installed
+        if ((package["extract_method"] in _TAR_MODES or package["extract_method"] == "deb")
+                and not package.get("sha256")):
+            try:
+                success = self._download_and_extract_streaming(package, progress_callback)
+            except UnsupportedArchiveError as e:
+                print(f"[WARN] {e}, downloading {package['name']} to a file instead")
+        
+        if success is None:
+            # Download package
+            file_path = self.download_package(package, 
+                lambda p: progress_callback(p * 0.7) if progress_callback else None)
+
+            if progress_callback:
+                progress_callback(70, "Extracting...")
+
+            # Extract package, the temporary file goes away even if it fails
+            try:
+                success = self.extract_package(package, file_path,
+                    lambda p: progress_callback(70 + p * 0.3) if progress_callback else None)
+            finally:
+                shutil.rmtree(os.path.dirname(file_path), ignore_errors=True)
+        return success
+    
+    def _create_launchers(self, package: Dict):
+        """Create the PATH entry and desktop shortcut of a freshly installed package"""
+        # Create PATH symlink if enabled in config (this also records the
+        # executable in the install index for the desktop shortcut)
+        if self.config.get("create_path_symlinks", True):
+            self.create_path_symlink(package)
+        
+        # Create desktop shortcut if enabled in config
+        if self.config.get("create_desktop_shortcuts", True):
+            self.create_desktop_shortcut(package)
+    
+    def install_packages(self, packages: List[Dict]) -> Dict[str, bool]:
+        """Install several packages, downloading them concurrently.
+        
+        Downloads run on max_concurrent_downloads threads; each package is
+        extracted as soon as its download finishes, one at a time.
+        Returns {package_id: success}.
+        """
+        results = {}
+        if not packages:
+            return results
+        max_workers = max(1, int(self.config.get("max_concurrent_downloads", 3)))
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(packages))) as executor:
+            futures = {executor.submit(self.download_package, package): package for package in packages}
+            for future in as_completed(futures):
+                package = futures[future]
+                try:
+                    file_path = future.result()
+                    try:
+                        results[package["id"]] = self.extract_package(package, file_path)
+                    finally:
+                        shutil.rmtree(os.path.dirname(file_path), ignore_errors=True)
+                    self._create_launchers(package)
+                except Exception as e:
+                    print(f"❌ {e}")
+                    results[package["id"]] = False
+        return results
+    
+    def _download_and_extract_streaming(self, package: Dict, progress_callback=None) -> bool:
+        """Download a tar or .deb archive and extract it at the same time, without a temp file.
+        
+        A thread copies the response into a pipe while tarfile reads the other end,
+        so the install takes about as long as the download alone.
+        """
+        url = package["url_pattern"]
+        timeout = (10, self.config.get("download_timeout", 30))
+        try:
+            response = self.session.get(url, stream=True, timeout=timeout)
+            response.raise_for_status()
+        except Exception as e:
+            raise Exception(f"Failed to download {package['name']}: {str(e)}")
+        
+        default_name = f"{package['id']}.{package['type'].split('.')[-1]}"
+        file_name = os.path.basename(self._download_target(response, "", default_name))
+        total_size = int(response.headers.get('content-length', 0))
+        # With a Content-Encoding, Content-Length counts the encoded bytes
+        expected_size = total_size if 'content-encoding' not in response.headers else 0
+        read_fd, write_fd = os.pipe()
+        download_errors = []
+        downloaded = 0
+        
+        def produce():
+            nonlocal downloaded
+            try:
+                with response, os.fdopen(write_fd, 'wb') as pipe:
+                    for chunk in response.iter_content(chunk_size=256 * 1024):
+                        if chunk:
+                            pipe.write(chunk)
+                            downloaded += len(chunk)
+                            if progress_callback and total_size > 0:
+                                progress_callback(int(downloaded / total_size * 90))
+            except BrokenPipeError:
+                pass  # extraction failed and closed its end, its error is reported
+            except Exception as e:
+                download_errors.append(e)
+        
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        
+        def verify():
+            # In stream mode tarfile takes a truncated archive for a complete
+            # one, so the download itself must have finished: read what is
+            # left (tar padding, other .deb members) and check the byte count
+            while pipe.read(1024 * 1024):
+                pass
+            producer.join()
+            if download_errors:
+                raise download_errors[0]
+            if expected_size and downloaded != expected_size:
+                raise Exception(f"incomplete download: got {downloaded} of {expected_size} bytes")
+        
+        try:
+            with os.fdopen(read_fd, 'rb') as pipe:
+                success = self.extract_package(package, file_name, fileobj=pipe, verify=verify)
+        except Exception:
+            producer.join()
+            if download_errors:
+                raise Exception(f"Failed to download {package['name']}: {str(download_errors[0])}")
+            raise
+        return success
+    
+    def uninstall_package(self, package_id: str, force_kill: bool = False,
+                          running_processes: Optional[List[Dict]] = None) -> bool:
+        """Uninstall a package, with option to kill running processes.
+        
+        running_processes can be passed when the caller already looked them up.
+        """
         package_dir = self.install_dir / package_id
         
         if not package_dir.exists():
@@ -274,7 +1106,8 @@ exec ./{appimage_name} "$@"
         
         try:
             # Check if the application is running
-            running_processes = self._find_running_processes(package_id)
+            if running_processes is None:
+                running_processes = self._find_running_processes(package_id)
             
             if running_processes and not force_kill:
                 # Application is running, ask user what to do
@@ -288,7 +1121,6 @@ exec ./{appimage_name} "$@"
                     if self._kill_application_processes(running_processes):
                         print("✅ Application processes terminated successfully")
                         # Wait a moment for processes to fully terminate
-                        import time
                         time.sleep(2)
                     else:
                         print("❌ Failed to terminate some processes")
@@ -304,7 +1136,6 @@ exec ./{appimage_name} "$@"
                 # Force kill without asking
                 print(f"🔄 Force killing {package_id} processes...")
                 self._kill_application_processes(running_processes)
-                import time
                 time.sleep(2)
             
             # Proceed with uninstallation
@@ -321,8 +1152,17 @@ exec ./{appimage_name} "$@"
             if old_desktop_file.exists():
                 old_desktop_file.unlink()
             
-            # Remove package directory
+            # Remove package directory, and the staging/backup trees an
+            # interrupted install or update may have left next to it
             shutil.rmtree(package_dir)
+            with os.scandir(self.install_dir) as entries:
+                leftovers = [entry.path for entry in entries
+                             if entry.name == f".{package_id}.new" or entry.name == f".{package_id}.old"
+                             or entry.name.startswith(f".{package_id}.old.")]
+            for leftover in leftovers:
+                shutil.rmtree(leftover, ignore_errors=True)
+            self._update_install_index(package_id, None)
+            self._version_cache.pop(package_id, None)
             print(f"✅ {package_id} uninstalled successfully")
             return True
             
@@ -338,6 +1178,21 @@ exec ./{appimage_name} "$@"
         except Exception as e:
             raise Exception(f"Failed to uninstall {package_id}: {str(e)}")
     
+    def uninstall_packages(self, package_ids: List[str], force_kill: bool = False) -> Dict[str, bool]:
+        """Uninstall several packages, scanning running processes only once.
+        
+        Returns {package_id: success}.
+        """
+        results = {}
+        processes = self._find_running_processes_bulk(package_ids)
+        for package_id in package_ids:
+            try:
+                results[package_id] = self.uninstall_package(package_id, force_kill, processes[package_id])
+            except Exception as e:
+                print(f"❌ {e}")
+                results[package_id] = False
+        return results
+    
     def create_desktop_shortcut(self, package: Dict) -> bool:
         """Create desktop shortcut for installed package, with icon discovery"""
         try:
@@ -346,18 +1201,11 @@ exec ./{appimage_name} "$@"
 
             package_dir = self.install_dir / package["id"]
 
-            # Find executable
+            # Find executable, reusing the one create_path_symlink resolved
             executable_name = package.get("executable", package["id"])
-            executable_path = None
-            for root, dirs, files in os.walk(package_dir):
-                for file in files:
-                    if file.lower() == executable_name.lower() or file.lower().startswith(executable_name.lower()):
-                        file_path = Path(root) / file
-                        if os.access(file_path, os.X_OK):
-                            executable_path = file_path
-                            break
-                if executable_path:
-                    break
+            executable_path = self._get_indexed_executable(package["id"])
+            if not executable_path:
+                executable_path = self._find_executable(package_dir, executable_name)
             if not executable_path:
                 return False
 
@@ -371,15 +1219,20 @@ exec ./{appimage_name} "$@"
                 if candidate_path.exists():
                     icon_path = str(candidate_path)
                     break
-            # If not found, try to find any .png or .svg in the package dir
-            if not icon_path:
-                for file in package_dir.glob("*.png"):
-                    icon_path = str(file)
-                    break
+            # If not found, try to find any .png (or else .svg) in the package dir
             if not icon_path:
-                for file in package_dir.glob("*.svg"):
-                    icon_path = str(file)
-                    break
+                png_path = svg_path = None
+                with os.scandir(package_dir) as entries:
+                    for entry in entries:
+                        name = entry.name.lower()
+                        if name.startswith('.'):
+                            continue
+                        if png_path is None and name.endswith('.png'):
+                            png_path = entry.path
+                            break
+                        elif svg_path is None and name.endswith('.svg'):
+                            svg_path = entry.path
+                icon_path = png_path or svg_path
             # Fallback: use the icon field (emoji or name)
             if not icon_path:
                 icon_path = package.get('icon', 'application-default-icon')
@@ -403,8 +1256,7 @@ Terminal=false
 Type=Application
 Categories=Development;
 """
-            desktop_file.write_text(desktop_content)
-            os.chmod(desktop_file, 0o755)
+            self._write_executable(desktop_file, desktop_content)
             return True
         except Exception as e:
             print(f"Failed to create desktop shortcut: {str(e)}")
@@ -438,6 +1290,9 @@ Categories=Development;
                     if potential_exec.exists() and os.access(potential_exec, os.X_OK):
                         executable_path = potential_exec
                 
+                if executable_path and os.access(executable_path, os.X_OK):
+                    self._update_install_index(package["id"], {"executable_path": str(executable_path)})
+                
                 # Ajouter au PATH même si le dossier n'existe pas encore
                 if self.config.get("auto_configure_path", True):
                     self._add_app_to_path(package["id"], str(executable_dir))
@@ -447,47 +1302,46 @@ Categories=Development;
                 # même si l'exécutable n'existe pas encore
                 return True
             
-            # Priority search paths for common executable locations
-            priority_paths = [
-                "bin/",
-                "usr/bin/", 
-                "usr/share/*/bin/",
-                "opt/*/bin/",
-                ""  # root directory as last resort
-            ]
+            # Common executable locations are listed first; the whole package
+            # is only searched when none of them has a match
+            priority_dirs = []
+            for pattern in ("bin", "usr/bin", "usr/share/*/bin", "opt/*/bin"):
+                priority_dirs.extend(path for path in sorted(package_dir.glob(pattern)) if path.is_dir())
             
             candidates = []  # Store all potential executables
-            
-            for priority_path in priority_paths:
-                search_pattern = str(package_dir / priority_path) if priority_path else str(package_dir)
-                
-                for root, dirs, files in os.walk(search_pattern):
-                    for file in files:
-                        if (file.lower() == executable_name.lower() or 
-                            file.lower().startswith(executable_name.lower())):
-                            file_path = Path(root) / file
-                            
-                            # Skip .desktop files and other non-executable formats
-                            if (file_path.suffix.lower() in ['.desktop', '.txt', '.md', '.log'] or
-                                not os.access(file_path, os.X_OK)):
-                                continue
-                            
-                            # Calculate priority score
-                            score = 0
-                            if file.lower() == executable_name.lower():
-                                score += 100  # Exact match gets highest priority
-                            if "bin" in root:
-                                score += 50   # Files in bin directories get priority
-                            if not any(suffix in file.lower() for suffix in ['-tunnel', '-cli', '-helper']):
-                                score += 25   # Main executables over helper tools
-                            
-                            candidates.append((score, file_path))
+            executable_lower = executable_name.lower()
+            
+            for search_dirs, recursive in ((priority_dirs, False), ([package_dir], True)):
+                for search_dir in search_dirs:
+                    for root, entry in self._iter_executables(search_dir, recursive):
+                        file_lower = entry.name.lower()
+                        if not file_lower.startswith(executable_lower):
+                            continue
+                        
+                        # Skip .desktop files and other non-executable formats
+                        if file_lower.endswith(_NON_EXEC_SUFFIXES):
+                            continue
+                        file_path = Path(entry.path)
+                        
+                        # Calculate priority score
+                        score = 0
+                        if file_lower == executable_lower:
+                            score += 100  # Exact match gets highest priority
+                        if "bin" in root:
+                            score += 50   # Files in bin directories get priority
+                        if not _HELPER_EXEC_RE.search(file_lower):
+                            score += 25   # Main executables over helper tools
+                        
+                        candidates.append((score, file_path))
+                if candidates:
+                    break
             
             # Choose the best candidate
             if candidates:
                 candidates.sort(key=lambda x: x[0], reverse=True)
                 executable_path = candidates[0][1]
                 print(f"Selected executable: {executable_path} (score: {candidates[0][0]})")
+                self._update_install_index(package["id"], {"executable_path": str(executable_path)})
             
             if not executable_path:
                 print(f"Warning: Could not find executable for {package['name']}")
@@ -504,6 +1358,39 @@ Categories=Development;
             print(f"Failed to add to PATH: {str(e)}")
             return False
 
+    def _iter_executables(self, top, recursive: bool = True):
+        """Yield (directory, DirEntry) for executable files under top, breadth first"""
+        queue = deque([str(top)])
+        while queue:
+            current = queue.popleft()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if not recursive or entry.name in _EXEC_SEARCH_SKIP_DIRS:
+                                    continue
+                                if entry.name == "doc" and os.path.basename(current) == "share":
+                                    continue
+                                queue.append(entry.path)
+                            elif entry.is_file() and entry.stat().st_mode & 0o111:
+                                yield current, entry
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+    
+    def _find_executable(self, package_dir: Path, executable_name: str) -> Optional[Path]:
+        """Find the package executable: exact name first, else the first name starting with it"""
+        executable_lower = executable_name.lower()
+        fallback = None
+        for root, entry in self._iter_executables(package_dir):
+            if entry.name == executable_name or entry.name.lower() == executable_lower:
+                return Path(entry.path)
+            if fallback is None and entry.name.lower().startswith(executable_lower):
+                fallback = Path(entry.path)
+        return fallback
+
     def remove_path_symlink(self, package_id: str) -> bool:
         """Remove application path from PATH when uninstalling"""
         try:
@@ -516,12 +1403,19 @@ Categories=Development;
         """Check for available updates for installed packages (générique, basé sur url_pattern du JSON)"""
         available_updates = []
         try:
-            all_packages = self.get_available_packages()
-            package_dict = self.get_package_dict()
-            installed_versions = {}
-            for package in all_packages:
-                if self.is_package_installed(package["id"]):
-                    installed_versions[package["id"]] = self.get_installed_version(package["id"])
+            # Only installed packages need their latest version resolved
+            installed_configs = []
+            for config_file, mtime in self._scan_package_configs():
+                try:
+                    package_config = self._load_package_config(config_file, mtime)
+                except Exception as e:
+                    print(f"Error loading package config {config_file}: {e}")
+                    continue
+                if self.is_package_installed(package_config["id"]):
+                    installed_configs.append((config_file, mtime))
+            package_dict = {package["id"]: package for package in self._resolve_packages(installed_configs)}
+            installed_versions = {package_id: self.get_installed_version(package_id)
+                                  for package_id in package_dict}
             updates = self.fetcher.check_for_updates(installed_versions, package_dict)
             for package_id, need_update in updates.items():
                 if need_update:
@@ -545,25 +1439,36 @@ Categories=Development;
         try:
             available_packages = self.get_available_packages()
             available_by_id = {pkg["id"]: pkg for pkg in available_packages}
+            index = self._load_install_index() or {}
             
-            for package_dir in self.install_dir.iterdir():
-                if package_dir.is_dir() and any(package_dir.iterdir()):
-                    package_id = package_dir.name
-                    version = self.get_installed_version(package_id)
+            with os.scandir(self.install_dir) as entries:
+                for entry in entries:
+                    # Skip hidden staging/backup trees left by extract_package
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False) and self._dir_has_entries(entry.path):
+                        package_id = entry.name
+                        indexed = index.get(package_id)
+                        if indexed:
+                            version = indexed.get("version")
+                            install_date = indexed.get("install_date") or entry.stat().st_mtime
+                        else:
+                            version = self.get_installed_version(package_id)
+                            install_date = entry.stat().st_mtime
                     
-                    # Get package info from available packages
-                    package_info = available_by_id.get(package_id, {
-                        "id": package_id,
-                        "name": package_id.title(),
-                        "description": "Locally installed package",
-                        "icon": "📦"
-                    })
+                        # Get package info from available packages
+                        package_info = available_by_id.get(package_id, {
+                            "id": package_id,
+                            "name": package_id.title(),
+                            "description": "Locally installed package",
+                            "icon": "📦"
+                        })
                     
-                    installed_packages.append({
-                        **package_info,
-                        "installed_version": version,
-                        "install_date": package_dir.stat().st_mtime
-                    })
+                        installed_packages.append({
+                            **package_info,
+                            "installed_version": version,
+                            "install_date": install_date
+                        })
         
         except Exception as e:
             print(f"Error getting installed packages: {e}")
@@ -572,10 +1477,17 @@ Categories=Development;
 
     def _ensure_local_bin_in_path(self):
         """Ensure ~/.local/bin is in PATH by updating appropriate shell config files"""
+        if self._path_checked:
+            return True
         try:
             bin_dir = Path.home() / ".local" / "bin"
             bin_path_export = f'export PATH="$HOME/.local/bin:$PATH"'
             
+            # Check if already in PATH before touching any shell config
+            if str(bin_dir) in os.environ.get('PATH', '').split(os.pathsep):
+                self._path_checked = True
+                return True
+            
             # Detect current shell and appropriate config files
             shell_configs = self._detect_shell_configs()
             
@@ -583,20 +1495,15 @@ Categories=Development;
                 print("Warning: Could not detect shell configuration files")
                 return False
             
-            # Check if already in PATH
-            try:
-                current_path = os.environ.get('PATH', '')
-                if str(bin_dir) in current_path:
-                    return True
-            except:
-                pass
-            
             # Add to each detected shell config
             updated_files = []
             for config_file, shell_name in shell_configs:
                 if self._add_path_to_shell_config(config_file, bin_path_export, shell_name):
                     updated_files.append((config_file, shell_name))
             
+            # Every config file now has the export, no need to scan them again
+            self._path_checked = True
+            
             if updated_files:
                 print(f"Added ~/.local/bin to PATH in:")
                 for config_file, shell_name in updated_files:
@@ -612,12 +1519,22 @@ Categories=Development;
     
     def _detect_shell_configs(self) -> List[Tuple[Path, str]]:
         """Detect which shell configuration files to update based on current shell and available files"""
-        shell_configs = []
         home = Path.home()
         
         # Detect current shell from environment
         current_shell = self._get_current_shell()
         
+        # Creating or deleting an rc file changes the home directory's mtime
+        try:
+            home_mtime = os.stat(home).st_mtime_ns
+        except OSError:
+            home_mtime = None
+        cache_key = (current_shell, home)
+        cached = self._shell_configs_cache.get(cache_key)
+        if cached and cached[0] == home_mtime:
+            return list(cached[1])
+        
+        shell_configs = []
         # Priority order based on current shell
         if current_shell == "zsh":
             potential_configs = [
@@ -657,10 +1574,22 @@ Categories=Development;
                 except:
                     pass
         
-        return shell_configs
+        # touch() above may have changed the mtime
+        try:
+            home_mtime = os.stat(home).st_mtime_ns
+        except OSError:
+            home_mtime = None
+        self._shell_configs_cache[cache_key] = (home_mtime, shell_configs)
+        return list(shell_configs)
     
     def _get_current_shell(self) -> str:
         """Detect the currently used shell"""
+        if self._current_shell is None:
+            self._current_shell = self._detect_current_shell()
+        return self._current_shell
+    
+    def _detect_current_shell(self) -> str:
+        """Detect the shell from the preference, environment, parent process or passwd"""
         # Check user preference first
         preferred_shell = self.config.get("preferred_shell", "auto")
         if preferred_shell != "auto" and preferred_shell in ['bash', 'zsh', 'fish']:
@@ -681,8 +1610,7 @@ Categories=Development;
         
         # Method 3: Check parent process (fallback)
         try:
-            import psutil
-            parent = psutil.Process().parent()
+            parent = _get_psutil().Process().parent()
             if parent:
                 parent_name = parent.name()
                 if parent_name in ['zsh', 'bash', 'fish']:
@@ -712,7 +1640,7 @@ Categories=Development;
                 content = config_file.read_text()
             
             # Check if PATH export already exists
-            if "~/.local/bin" in content or "$HOME/.local/bin" in content:
+            if _LOCAL_BIN_RE.search(content):
                 return False  # Already configured
             
             # Prepare the export line based on shell type
@@ -724,19 +1652,55 @@ Categories=Development;
                 comment = "# Added by BenPak for command line access"
             
             # Add the export to the file
-            if content and not content.endswith('\n'):
-                content += '\n'
-            
-            content += f'\n{comment}\n{export_line}\n'
+            separator = '\n' if content and not content.endswith('\n') else ''
+            new_content = ''.join([content, separator, '\n', comment, '\n', export_line, '\n'])
             
             # Write back to file
-            config_file.write_text(content)
+            self._write_text_atomic(config_file, new_content)
             return True
             
         except Exception as e:
             print(f"Failed to update {config_file}: {str(e)}")
             return False
     
+    def _update_shell_configs(self, shell_configs: List[Tuple[Path, str]], update) -> List[Tuple[Path, str]]:
+        """Run update(config_file, shell_name) on the shell configs concurrently.
+        
+        Returns the configs it changed, in detection order. Configs that are the
+        same file through a symlink are updated one after the other.
+        """
+        groups = {}
+        for config_file, shell_name in shell_configs:
+            groups.setdefault(os.path.realpath(config_file), []).append((config_file, shell_name))
+        
+        def update_group(group):
+            return [(config_file, shell_name) for config_file, shell_name in group
+                    if update(config_file, shell_name)]
+        
+        with ThreadPoolExecutor(max_workers=min(4, len(groups))) as executor:
+            updated = {item for group in executor.map(update_group, groups.values()) for item in group}
+        return [item for item in shell_configs if item in updated]
+    
+    def _write_text_atomic(self, path: Path, content: str):
+        """Replace a text file in one step, so a crash never leaves it half written"""
+        # Write through symlinks (dotfiles repos) instead of replacing them
+        target = Path(os.path.realpath(path))
+        tmp_file = target.with_name(target.name + ".tmp")
+        try:
+            with open(tmp_file, 'w') as f:
+                # Keep the rc file's permissions
+                if target.exists():
+                    os.fchmod(f.fileno(), stat.S_IMODE(target.stat().st_mode))
+                f.write(content)
+            os.replace(tmp_file, target)
+        except Exception:
+            # Path.unlink(missing_ok=True) is 3.8+
+            try:
+                tmp_file.unlink()
+            except FileNotFoundError:
+                pass
+            raise
+    
     def get_shell_info(self) -> Dict[str, any]:
         """Get information about current shell configuration"""
         current_shell = self._get_current_shell()
@@ -753,6 +1717,8 @@ Categories=Development;
         """Set user shell preference and auto-configure option"""
         if shell in ["auto", "bash", "zsh", "fish"]:
             self.config.set("preferred_shell", shell)
+            self._current_shell = None
+            self._shell_configs_cache.clear()
         
         if auto_configure is not None:
             self.config.set("auto_configure_path", auto_configure)
@@ -779,11 +1745,14 @@ Categories=Development;
             except:
                 pass
             
-            # Add to each detected shell config
-            updated_files = []
-            for config_file, shell_name in shell_configs:
-                if self._add_app_path_to_shell_config(config_file, package_id, executable_dir, shell_name):
-                    updated_files.append((config_file, shell_name))
+            # Add to each detected shell config, reading each file only once
+            def update(config_file, shell_name):
+                content = config_file.read_text() if config_file.exists() else ""
+                if f'"{executable_dir}:' in content or f'"{executable_dir}"' in content:
+                    return False  # Added in an earlier session, not in this $PATH yet
+                return self._add_app_path_to_shell_config(config_file, package_id, executable_dir, shell_name,
+                                                          content=content)
+            updated_files = self._update_shell_configs(shell_configs, update)
             
             if updated_files:
                 print(f"Added {package_id} to PATH in:")
@@ -809,10 +1778,9 @@ Categories=Development;
                 return False
             
             # Remove from each detected shell config
-            updated_files = []
-            for config_file, shell_name in shell_configs:
-                if self._remove_app_path_from_shell_config(config_file, package_id):
-                    updated_files.append((config_file, shell_name))
+            updated_files = self._update_shell_configs(
+                shell_configs,
+                lambda config_file, shell_name: self._remove_app_path_from_shell_config(config_file, package_id))
             
             if updated_files:
                 print(f"Removed {package_id} from PATH in:")
@@ -826,22 +1794,23 @@ Categories=Development;
             print(f"Failed to remove {package_id} from PATH: {str(e)}")
             return False
     
-    def _add_app_path_to_shell_config(self, config_file: Path, package_id: str, executable_dir: str, shell_name: str) -> bool:
-        """Add application PATH export to a specific shell configuration file"""
+    def _add_app_path_to_shell_config(self, config_file: Path, package_id: str, executable_dir: str, shell_name: str,
+                                      content: Optional[str] = None) -> bool:
+        """Add application PATH export to a specific shell configuration file.
+        
+        content can be passed when the caller already read the file.
+        """
         try:
             # Read current content
-            content = ""
-            if config_file.exists():
-                content = config_file.read_text()
+            if content is None:
+                content = config_file.read_text() if config_file.exists() else ""
             
             # Check if this app's PATH export already exists
+            # Compare whole lines: "# BenPak - code" must not match "# BenPak - codeium"
             benpak_marker = f"# BenPak - {package_id}"
-            if benpak_marker in content:
+            if benpak_marker in content.splitlines():
                 return False  # Already configured
             
-            # Préférer le ~ pour le home dans l'export PATH
-            from pathlib import Path as _Path
-            home = str(_Path.home())
             # Use absolute path instead of ~ to avoid expansion issues
             exec_dir_display = executable_dir
             # Prepare the export line based on shell type
@@ -853,13 +1822,11 @@ Categories=Development;
                 comment = f"# BenPak - {package_id}"
             
             # Add the export to the file
-            if content and not content.endswith('\n'):
-                content += '\n'
-            
-            content += f'\n{comment}\n{export_line}\n'
+            separator = '\n' if content and not content.endswith('\n') else ''
+            new_content = ''.join([content, separator, '\n', comment, '\n', export_line, '\n'])
             
             # Write back to file
-            config_file.write_text(content)
+            self._write_text_atomic(config_file, new_content)
             return True
             
         except Exception as e:
@@ -873,25 +1840,15 @@ Categories=Development;
                 return False
             
             content = config_file.read_text()
-            lines = content.split('\n')
-            new_lines = []
-            skip_next = False
-            
-            for line in lines:
-                # Skip the comment line and the next export line for this package
-                if f"# BenPak - {package_id}" in line:
-                    skip_next = True
-                    continue
-                elif skip_next and ("export PATH=" in line or "set -gx PATH" in line):
-                    skip_next = False
-                    continue
-                else:
-                    new_lines.append(line)
+            benpak_marker = f"# BenPak - {package_id}"
+            if benpak_marker not in content:
+                return False
             
-            # Write back to file if something was removed
-            new_content = '\n'.join(new_lines)
-            if new_content != content:
-                config_file.write_text(new_content)
+            # Drop the marker line and the export right after it, nothing else
+            # (another package's id may start with this one)
+            new_content, removed = _benpak_block_re(package_id).subn('', content)
+            if removed:
+                self._write_text_atomic(config_file, new_content)
                 return True
             
             return False
@@ -902,92 +1859,197 @@ Categories=Development;
     
     def _find_running_processes(self, package_id: str) -> List[Dict]:
         """Find running processes related to the package (robuste, multi-cas)"""
-        import psutil
-        running_processes = []
-        package_dir = str(self.install_dir / package_id)
-        package_dir_real = os.path.realpath(package_dir)
-        exe_names = set()
+        return self._find_running_processes_bulk([package_id])[package_id]
+    
+    def _find_running_processes_bulk(self, package_ids: List[str]) -> Dict[str, List[Dict]]:
+        """Find running processes for several packages with a single process table scan"""
+        psutil = _get_psutil()
+        running_processes = {package_id: [] for package_id in package_ids}
+        targets = []
+        for package_id in package_ids:
+            package_dir = str(self.install_dir / package_id)
+            package_dir_real = os.path.realpath(package_dir)
+            targets.append((package_id, package_dir, package_dir_real, self._package_exe_names(package_dir)))
+        # Executables outside the install dir can't belong to a package, only
+        # symlinks among them need resolving
+        install_prefixes = (str(self.install_dir) + os.sep, os.path.realpath(self.install_dir) + os.sep)
 
-        # Collect all executable file names in the package dir
-        for root, dirs, files in os.walk(package_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                if os.access(file_path, os.X_OK) and not file_path.endswith(('.desktop', '.txt', '.md', '.log')):
-                    exe_names.add(os.path.basename(file_path).lower())
+        def add(package_id, proc, info, exe_path):
+            if proc is None:
+                # /proc snapshot: only matched processes get a psutil handle
+                proc = info.get('process') or psutil.Process(info['pid'])
+                info['process'] = proc
+            running_processes[package_id].append({
+                'pid': info['pid'],
+                'name': info['name'],
+                'exe': exe_path,
+                'process': proc
+            })
 
-        for proc in psutil.process_iter(['pid', 'name', 'exe', 'cmdline']):
+        for proc, info in self._process_snapshot():
             try:
-                info = proc.info
-                # 1. Check if process executable path is in our package dir (realpath)
                 exe_path = info.get('exe') or ''
-                if exe_path:
+                if exe_path.startswith(install_prefixes):
+                    exe_path_real = exe_path
+                elif exe_path and os.path.islink(exe_path):
                     exe_path_real = os.path.realpath(exe_path)
-                    if package_dir in exe_path_real or package_dir_real in exe_path_real:
-                        running_processes.append({
-                            'pid': info['pid'],
-                            'name': info['name'],
-                            'exe': exe_path,
-                            'process': proc
-                        })
-                        continue
-                # 2. Check if process name matches any executable in the package
-                if info['name'] and info['name'].lower() in exe_names:
-                    running_processes.append({
-                        'pid': info['pid'],
-                        'name': info['name'],
-                        'exe': exe_path,
-                        'process': proc
-                    })
+                else:
+                    exe_path_real = ''
+                name_lower = info['name'].lower() if info.get('name') else None
+                unmatched = []
+                for target in targets:
+                    package_id, package_dir, package_dir_real, exe_names = target
+                    # 1. Check if process executable path is in our package dir (realpath)
+                    # 2. Check if process name matches any executable in the package
+                    if ((exe_path_real and exe_path_real.startswith((package_dir + os.sep, package_dir_real + os.sep)))
+                            or (name_lower and name_lower in exe_names)):
+                        add(package_id, proc, info, exe_path)
+                    else:
+                        unmatched.append(target)
+                if not unmatched:
                     continue
-                # 3. Check if command line contains the package dir
-                cmdline = info.get('cmdline') or []
-                if any(package_dir in arg or package_dir_real in arg for arg in cmdline):
-                    running_processes.append({
-                        'pid': info['pid'],
-                        'name': info['name'],
-                        'exe': exe_path,
-                        'process': proc
-                    })
+                # 3. Check if command line contains the package dir; only read
+                # from /proc for processes the cheap checks didn't match
+                if 'cmdline' not in info:
+                    info['cmdline'] = proc.cmdline() if proc else self._read_proc_cmdline(info['pid'])
+                cmdline = info['cmdline'] or []
+                for package_id, package_dir, package_dir_real, exe_names in unmatched:
+                    if any(package_dir in arg or package_dir_real in arg for arg in cmdline):
+                        add(package_id, proc, info, exe_path)
             except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                 continue
             except Exception:
                 continue
         return running_processes
     
+    def _package_exe_names(self, package_dir: str) -> set:
+        """Lowercased names of the executables in a package, cached until the directory changes"""
+        try:
+            st = os.stat(package_dir)
+        except OSError:
+            return set()
+        key = (st.st_ino, st.st_mtime_ns)
+        cached = self._exe_name_cache.get(package_dir)
+        if cached and cached[0] == key:
+            return cached[1]
+        
+        # Collect all executable file names in the package dir
+        exe_names = {entry.name.lower() for root, entry in self._iter_executables(package_dir)
+                     if not entry.name.endswith(_NON_EXEC_SUFFIXES)}
+        self._exe_name_cache[package_dir] = (key, exe_names)
+        return exe_names
+    
+    def _process_snapshot(self) -> List:
+        """List (process, info) for running processes, reusing a snapshot younger than 500 ms"""
+        now = time.monotonic()
+        if self._proc_cache and now - self._proc_cache[0] < _PROCESS_SNAPSHOT_TTL:
+            return self._proc_cache[1]
+        # cmdline is read later, only for processes that need it
+        if sys.platform.startswith('linux') and os.path.isdir('/proc'):
+            snapshot = self._proc_snapshot_linux()
+        else:
+            snapshot = [(proc, proc.info)
+                        for proc in _get_psutil().process_iter(['pid', 'name', 'exe'])]
+        self._proc_cache = (now, snapshot)
+        return snapshot
+    
+    def _proc_snapshot_linux(self) -> List:
+        """Read pid, name and exe straight from /proc: one readlink and one small read
+        per process, instead of the several files psutil opens"""
+        snapshot = []
+        with os.scandir('/proc') as entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                pid = int(entry.name)
+                try:
+                    exe = os.readlink(f'/proc/{pid}/exe')
+                    if exe.endswith(' (deleted)') and not os.path.exists(exe):
+                        exe = exe[:-len(' (deleted)')]
+                except OSError:
+                    exe = ''  # Kernel thread or another user's process
+                try:
+                    with open(f'/proc/{pid}/comm', 'rb') as f:
+                        name = f.read().rstrip(b'\n').decode(errors='replace')
+                except OSError:
+                    continue  # Process already gone
+                info = {'pid': pid, 'name': name, 'exe': exe}
+                if len(name) >= 15:
+                    # comm is cut at 15 characters, take the full name from cmdline like psutil
+                    cmdline = self._read_proc_cmdline(pid)
+                    info['cmdline'] = cmdline
+                    if cmdline:
+                        full_name = os.path.basename(cmdline[0])
+                        if full_name.startswith(name):
+                            info['name'] = full_name
+                snapshot.append((None, info))
+        return snapshot
+    
+    def _read_proc_cmdline(self, pid: int) -> List[str]:
+        """Command line of a process from /proc (empty when it can't be read)"""
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                data = f.read()
+        except OSError:
+            return []
+        return [arg.decode(errors='replace') for arg in data.rstrip(b'\0').split(b'\0')] if data else []
+    
     def _kill_application_processes(self, processes: List[Dict]) -> bool:
         """Kill the specified processes"""
         success = True
+        # The process table is about to change
+        self._proc_cache = None
         
+        # Ask every process to stop first, then wait for all of them at once:
+        # an app with several helper processes gets one 5 s budget, not one each
+        terminating = []
         for proc_info in processes:
             try:
                 if proc_info['process']:
                     # Use psutil if available
-                    proc = proc_info['process']
                     print(f"🔄 Terminating {proc_info['name']} (PID: {proc_info['pid']})...")
-                    
-                    # Try graceful termination first
-                    proc.terminate()
-                    
-                    # Wait for process to terminate
                     try:
-                        proc.wait(timeout=5)
-                        print(f"✅ {proc_info['name']} terminated gracefully")
-                    except:
-                        # Force kill if graceful termination fails
-                        print(f"🔧 Force killing {proc_info['name']}...")
-                        proc.kill()
-                        proc.wait(timeout=2)
-                        print(f"✅ {proc_info['name']} force killed")
+                        proc_info['process'].terminate()
+                    except _get_psutil().NoSuchProcess:
+                        continue  # Exited on its own
+                    terminating.append(proc_info)
                 else:
-                    # Fallback to kill command
+                    # Fallback without psutil: signal the pid directly
                     print(f"🔄 Killing process {proc_info['pid']}...")
-                    subprocess.run(['kill', str(proc_info['pid'])], check=True)
-                    print(f"✅ Process {proc_info['pid']} killed")
+                    try:
+                        os.kill(proc_info['pid'], signal.SIGTERM)
+                        print(f"✅ Process {proc_info['pid']} killed")
+                    except ProcessLookupError:
+                        pass  # Already gone
                     
             except Exception as e:
                 print(f"❌ Failed to kill {proc_info['name']} (PID: {proc_info['pid']}): {str(e)}")
                 success = False
         
+        if terminating:
+            psutil = _get_psutil()
+            info_by_proc = {id(proc_info['process']): proc_info for proc_info in terminating}
+            gone, alive = psutil.wait_procs([proc_info['process'] for proc_info in terminating], timeout=5)
+            for proc in gone:
+                print(f"✅ {info_by_proc[id(proc)]['name']} terminated gracefully")
+            
+            # Force kill what didn't stop in time
+            for proc in alive:
+                print(f"🔧 Force killing {info_by_proc[id(proc)]['name']}...")
+                try:
+                    proc.kill()
+                except psutil.NoSuchProcess:
+                    pass
+                except Exception as e:
+                    print(f"❌ Failed to kill {info_by_proc[id(proc)]['name']} (PID: {proc.pid}): {str(e)}")
+            if alive:
+                gone, alive = psutil.wait_procs(alive, timeout=2)
+                for proc in gone:
+                    print(f"✅ {info_by_proc[id(proc)]['name']} force killed")
+                for proc in alive:
+                    print(f"❌ Failed to kill {info_by_proc[id(proc)]['name']} (PID: {proc.pid})")
+                    success = False
+        
         return success
     
     def uninstall_package_interactive(self, package_id: str) -> bool:
@@ -1011,13 +2073,8 @@ Categories=Development;
     def launch_package(self, package_id: str) -> bool:
         """Launch an installed package"""
         try:
-            # Get package info
-            packages = self.get_available_packages()
-            package = None
-            for pkg in packages:
-                if pkg["id"] == package_id:
-                    package = pkg
-                    break
+            # Get package info, from the last refresh when there was one
+            package = self.get_package_dict().get(package_id)
             
             if not package:
                 print(f"❌ Package {package_id} not found")
@@ -1033,36 +2090,27 @@ Categories=Development;
             
             # Si bin_path est défini, on commence la recherche par ce chemin
             bin_path = package.get("bin_path")
-            possible_paths = []
-            if bin_path:
-                possible_paths.append(install_path / bin_path / executable_name)
-            possible_paths.extend([
-                install_path / executable_name,
-                install_path / "bin" / executable_name,
-                install_path / f"{executable_name}.AppImage",
-                install_path / f"{package_id}.AppImage",
-            ])
-            
+            candidates = [os.path.join(bin_path, executable_name)] if bin_path else []
+            candidates += [
+                executable_name,
+                os.path.join("bin", executable_name),
+                f"{executable_name}.AppImage",
+                f"{package_id}.AppImage",
+            ]
             # For specific packages, use known paths
-            if package_id == "vscode":
-                possible_paths.extend([
-                    install_path / "bin" / "code",
-                    install_path / "code",
-                    # Ne jamais inclure /usr/bin/code pour VSCode BenPak !
-                ])
-            elif package_id == "discord":
-                possible_paths.extend([
-                    install_path / "Discord",
-                    install_path / "discord",
-                ])
+            candidates += _LAUNCH_CANDIDATES.get(package_id, ())
+            possible_paths = [install_path / candidate for candidate in candidates]
             
             executable_path = None
             for path in possible_paths:
-                if path.exists() and path.is_file():
-                    # Check if it's executable
-                    if os.access(path, os.X_OK):
-                        executable_path = path
-                        break
+                # One stat per candidate: regular file with an exec bit
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode) and st.st_mode & 0o111:
+                    executable_path = path
+                    break
             
             if not executable_path:
                 print(f"❌ Executable not found for {package_id}")
@@ -1071,10 +2119,15 @@ Categories=Development;
             
             # Launch the application in the background
             print(f"🚀 Launching {package['name']} from {executable_path}")
+            # Detached session so the app outlives BenPak; no preexec_fn so
+            # CPython can use vfork instead of a full fork of the GUI process
             subprocess.Popen([str(executable_path)], 
                            cwd=str(install_path),
+                           stdin=subprocess.DEVNULL,
                            stdout=subprocess.DEVNULL, 
-                           stderr=subprocess.DEVNULL)
+                           stderr=subprocess.DEVNULL,
+                           start_new_session=True,
+                           close_fds=True)
             
             return True
             
@@ -6,113 +6,88 @@ Quick test script for BenPak functionality
 import sys
 import os
 
-# Add src directory to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
-
 def test_config():
     """Test configuration system"""
     print("Testing configuration system...")
-    try:
-        from config import Config
-        config = Config()
-        
-        print(f"✅ Config loaded successfully")
-        print(f"   Install directory: {config.get('install_directory')}")
-        print(f"   Auto refresh: {config.get('auto_refresh_interval')} seconds")
-        print(f"   Create shortcuts: {config.get('create_desktop_shortcuts')}")
-        
-        return True
-    except Exception as e:
-        print(f"❌ Config test failed: {e}")
-        return False
+    from config import Config
+    config = Config()
+    
+    print(f"✅ Config loaded successfully")
+    print(f"   Install directory: {config.get('install_directory')}")
+    print(f"   Auto refresh: {config.get('auto_refresh_interval')} seconds")
+    print(f"   Create shortcuts: {config.get('create_desktop_shortcuts')}")
 
-def test_package_manager():
+def test_package_manager(pm):
     """Test package manager"""
     print("\nTesting package manager...")
-    try:
-        from package_manager import PackageManager
-        pm = PackageManager()
-        
-        packages = pm.get_available_packages()
-        print(f"✅ Package manager loaded successfully")
-        print(f"   Found {len(packages)} packages:")
-        
-        for package in packages:
-            installed = pm.is_package_installed(package['id'])
-            version = pm.get_installed_version(package['id']) if installed else "Not installed"
-            status = "✓" if installed else "✗"
-            print(f"   {status} {package['name']} ({package['id']}) - {version}")
-            print(f"     Latest: {package.get('latest_version', 'unknown')}")
-        
-        return True
-    except Exception as e:
-        print(f"❌ Package manager test failed: {e}")
-        return False
+    packages = pm.get_available_packages()
+    print(f"✅ Package manager loaded successfully")
+    print(f"   Found {len(packages)} packages:")
+    
+    for package in packages:
+        installed = pm.is_package_installed(package['id'])
+        version = pm.get_installed_version(package['id']) if installed else "Not installed"
+        status = "✓" if installed else "✗"
+        print(f"   {status} {package['name']} ({package['id']}) - {version}")
+        print(f"     Latest: {package.get('latest_version', 'unknown')}")
 
-def test_fetcher():
+def test_fetcher(pm):
     """Test package fetcher"""
     print("\nTesting package fetcher...")
-    try:
-        from fetcher import PackageFetcher
-        fetcher = PackageFetcher()
-        
-        print("✅ Fetcher loaded successfully")
-        
-        # Test version fetching for Discord
-        print("   Testing Discord version fetch...")
-        version, url = fetcher.get_discord_info()
-        print(f"     Discord: {version} - {url[:50]}...")
-        
-        # Test VSCode
-        print("   Testing VSCode version fetch...")
-        version, url = fetcher.get_vscode_info()
-        print(f"     VSCode: {version} - {url[:50]}...")
-        
-        return True
-    except Exception as e:
-        print(f"❌ Fetcher test failed: {e}")
-        return False
+    # Reuse the package manager's fetcher and its HTTP session
+    fetcher = pm.fetcher
+    
+    print("✅ Fetcher loaded successfully")
+    
+    # Test version fetching for Discord
+    print("   Testing Discord version fetch...")
+    version, url = fetcher.get_discord_info()
+    print(f"     Discord: {version} - {url[:50]}...")
+    
+    # Test VSCode
+    print("   Testing VSCode version fetch...")
+    version, url = fetcher.get_vscode_info()
+    print(f"     VSCode: {version} - {url[:50]}...")
 
-def test_shell_detection():
+def test_shell_detection(pm):
     """Test shell detection and PATH configuration"""
     print("\nTesting shell detection...")
-    try:
-        from package_manager import PackageManager
-        pm = PackageManager()
-        
-        shell_info = pm.get_shell_info()
-        print(f"✅ Shell detection working")
-        print(f"   Current shell: {shell_info['current_shell']}")
-        print(f"   Preferred shell: {shell_info['preferred_shell']}")
-        print(f"   Auto configure PATH: {shell_info['auto_configure_enabled']}")
-        print(f"   Detected config files:")
-        
-        for config_path, shell_name in shell_info['detected_configs']:
-            print(f"     - {config_path} ({shell_name})")
-        
-        return True
-    except Exception as e:
-        print(f"❌ Shell detection test failed: {e}")
-        return False
+    shell_info = pm.get_shell_info()
+    print(f"✅ Shell detection working")
+    print(f"   Current shell: {shell_info['current_shell']}")
+    print(f"   Preferred shell: {shell_info['preferred_shell']}")
+    print(f"   Auto configure PATH: {shell_info['auto_configure_enabled']}")
+    print(f"   Detected config files:")
+    
+    for config_path, shell_name in shell_info['detected_configs']:
+        print(f"     - {config_path} ({shell_name})")
 
 def main():
     """Run all tests"""
     print("=== BenPak Component Tests ===\n")
     
+    # Shared by the tests that need it, like the pytest session fixture
+    pm = None
+    try:
+        from package_manager import PackageManager
+        pm = PackageManager()
+    except Exception as e:
+        print(f"❌ Package manager init failed: {e}")
+    
     tests = [
-        test_config,
-        test_package_manager,
-        test_fetcher,
-        test_shell_detection
+        (test_config, ()),
+        (test_package_manager, (pm,)),
+        (test_fetcher, (pm,)),
+        (test_shell_detection, (pm,))
     ]
     
     results = []
-    for test in tests:
+    for test, args in tests:
         try:
-            result = test()
-            results.append(result)
+            test(*args)
+            results.append(True)
         except Exception as e:
-            print(f"❌ Test failed with exception: {e}")
+            print(f"❌ {test.__name__} failed: {e}")
             results.append(False)
     
     print(f"\n=== Test Results ===")
@@ -128,4 +103,6 @@ def main():
         return 1
 
 if __name__ == "__main__":
+    # Add src directory to path (pytest does it in conftest.py)
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
     sys.exit(main())
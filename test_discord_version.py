@@ -4,32 +4,26 @@ Test script pour vérifier la détection de version Discord
 """
 import sys
 import os
-sys.path.insert(0, '/home/bducrocq/projets/benpak/src')
-
-from fetcher import PackageFetcher
-from package_manager import PackageManager
 import json
 
-def test_discord_version():
+def test_discord_version(pm):
     print("=== Test de détection de version Discord ===")
     
     # Charger la config Discord
-    discord_config_path = "/home/bducrocq/projets/benpak/packages/configs/discord.json"
+    discord_config_path = os.path.join(os.path.dirname(__file__), "packages", "configs", "discord.json")
     with open(discord_config_path, 'r') as f:
         discord_config = json.load(f)
     
     print(f"Discord config: {discord_config}")
     
     # Tester la détection de version
-    fetcher = PackageFetcher()
-    updated_package = fetcher.update_package_info(discord_config)
+    updated_package = pm.fetcher.update_package_info(discord_config)
     
     print(f"Version détectée: {updated_package.get('latest_version')}")
     print(f"URL réelle: {updated_package.get('real_download_url')}")
     
     # Tester avec PackageManager
     print("\n=== Test avec PackageManager ===")
-    pm = PackageManager()
     
     # Vérifier le répertoire d'installation
     print(f"Répertoire d'installation: {pm.install_dir}")
@@ -66,4 +60,7 @@ def test_discord_version():
         print(f"Fichier .version introuvable: {version_file}")
 
 if __name__ == "__main__":
-    test_discord_version()
+    # Add src directory to path (pytest does it in conftest.py)
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+    from package_manager import PackageManager
+    test_discord_version(PackageManager())
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Tests for downloading packages: streamed installs and parallel range requests,
+against a local HTTP server
+"""
+
+import gzip
+import http.server
+import io
+import os
+import tarfile
+import tempfile
+import threading
+
+import pytest
+
+from test_extraction import make_deb, make_tar
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Serves server.routes: {path: {"body", "ranges", "cut", "chunked", "headers"}}.
+
+    ranges is "bytes" (advertised and honoured) or "ignored" (advertised, but
+    range requests get the whole body); cut closes the connection after that
+    many body bytes; chunked sends the body chunked and drops the connection
+    before the final chunk.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def _respond(self, send_body):
+        route = self.server.routes[self.path]
+        self.server.requests.append((self.command, self.headers.get("Range")))
+        body = route["body"]
+        status = 200
+        headers = dict(route.get("headers", {}))
+        if route.get("ranges"):
+            headers["Accept-Ranges"] = "bytes"
+        range_header = self.headers.get("Range")
+        if send_body and range_header and route.get("ranges") == "bytes":
+            start, end = (int(value) for value in range_header.split("=", 1)[1].split("-"))
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+            body = body[start:end + 1]
+            status = 206
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if route.get("chunked"):
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not send_body:
+            return
+
+        if route.get("chunked"):
+            for start in range(0, len(body), 16 * 1024):
+                piece = body[start:start + 16 * 1024]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(piece), piece))
+        else:
+            self.wfile.write(body[:route.get("cut", len(body))])
+        self.wfile.flush()
+        if route.get("chunked") or "cut" in route:
+            self.close_connection = True
+
+
+@pytest.fixture
+def server():
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.routes = {}
+    httpd.requests = []
+    threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """PackageManager installing into a temporary directory"""
+    from package_manager import PackageManager
+    return PackageManager(install_dir=str(tmp_path / "programs"))
+
+
+def serve(server, path, body, **options):
+    server.routes[path] = dict(options, body=body)
+    return f"http://127.0.0.1:{server.server_port}{path}"
+
+
+def demo_package(url, extract_method="tar_gz", version="1.0"):
+    return {
+        "id": "demo",
+        "name": "Demo",
+        "type": "deb" if extract_method == "deb" else "tar.gz",
+        "extract_method": extract_method,
+        "url_pattern": url,
+        "latest_version": version,
+    }
+
+
+def demo_tar(version, files=200, compression="gz"):
+    """demo-<version>/bin/demo plus some random files, so the archive spans several reads"""
+    members = [(f"demo-{version}/bin/demo", "file", f"demo {version}".encode(), {"mode": 0o755})]
+    members += [(f"demo-{version}/data/f{i}", "file", os.urandom(1500), {}) for i in range(files)]
+    return make_tar(members, compression)
+
+
+def install_v1(server, manager):
+    assert manager.download_and_extract(demo_package(serve(server, "/v1.tar.gz", demo_tar("1.0"))))
+    assert (manager.install_dir / "demo" / "bin" / "demo").read_bytes() == b"demo 1.0"
+
+
+def assert_v1_kept(manager):
+    assert (manager.install_dir / "demo" / "bin" / "demo").read_bytes() == b"demo 1.0"
+    assert manager.get_installed_version("demo") == "1.0"
+    assert not (manager.install_dir / ".demo.new").exists()
+
+
+@pytest.mark.parametrize("extract_method", ["tar_gz", "deb"])
+def test_streaming_install(server, manager, extract_method):
+    """tar and .deb archives are extracted while they download"""
+    if extract_method == "deb":
+        body = make_deb([("./opt/demo/demo", "file", b"deb demo", {"mode": 0o755})], version="2.0")
+        expected = manager.install_dir / "demo" / "opt" / "demo" / "demo"
+    else:
+        body = demo_tar("2.0")
+        expected = manager.install_dir / "demo" / "bin" / "demo"
+    url = serve(server, "/demo", body)
+
+    assert manager.download_and_extract(demo_package(url, extract_method, version="2.0"))
+
+    assert expected.read_bytes() in (b"deb demo", b"demo 2.0")
+    assert manager.get_installed_version("demo") == "2.0"
+    # Streamed: one GET, no temp file download first
+    assert [method for method, _ in server.requests] == ["GET"]
+
+
+def test_streaming_keeps_old_install_when_truncated(server, manager):
+    """A download cut short of its Content-Length never replaces the installed version"""
+    install_v1(server, manager)
+    body = demo_tar("2.0", files=400)
+    url = serve(server, "/v2.tar.gz", body, cut=len(body) * 2 // 3)
+
+    with pytest.raises(Exception):
+        manager.download_and_extract(demo_package(url, version="2.0"))
+
+    assert_v1_kept(manager)
+
+
+def test_streaming_rejects_archive_cut_between_members(server, manager):
+    """tarfile takes EOF between two members for the end of the archive, the
+    failed download must still be noticed before the swap"""
+    install_v1(server, manager)
+    raw = demo_tar("2.0", files=50, compression=None)
+    # Only the first 20 members (512-byte header + 1536 bytes of data each, the
+    # executable is a single block), without the end-of-archive blocks
+    body = gzip.compress(raw[:1024 + 20 * 2048])
+    with tarfile.open(fileobj=io.BytesIO(body), mode="r|gz") as tar:
+        assert len(tar.getmembers()) == 21
+    url = serve(server, "/v2.tar.gz", body, chunked=True)
+
+    with pytest.raises(Exception):
+        manager.download_and_extract(demo_package(url, version="2.0"))
+
+    assert_v1_kept(manager)
+
+
+def test_streaming_keeps_old_install_on_bad_archive(server, manager):
+    """A corrupt archive fails the install and leaves the previous version alone"""
+    install_v1(server, manager)
+    url = serve(server, "/v2.tar.gz", b"\x1f\x8b" + os.urandom(64 * 1024))
+
+    with pytest.raises(Exception):
+        manager.download_and_extract(demo_package(url, version="2.0"))
+
+    assert_v1_kept(manager)
+
+
+def test_ranged_download(server, manager, monkeypatch):
+    """Large files advertised with Accept-Ranges are fetched as parallel parts"""
+    import package_manager
+    monkeypatch.setattr(package_manager, "_RANGED_DOWNLOAD_MIN_SIZE", 1024)
+    body = demo_tar("1.0")
+    url = serve(server, "/demo.tar.gz", body, ranges="bytes")
+
+    file_path = manager.download_package(demo_package(url))
+    try:
+        with open(file_path, "rb") as f:
+            assert f.read() == body
+    finally:
+        os.unlink(file_path)
+        os.rmdir(os.path.dirname(file_path))
+
+    ranges = [range_header for method, range_header in server.requests if method == "GET"]
+    assert len(ranges) == package_manager._RANGED_DOWNLOAD_PARTS
+    assert all(range_header for range_header in ranges)
+
+
+def test_ranged_download_falls_back_to_single_stream(server, manager, monkeypatch):
+    """A server that ignores Range despite advertising it gets one plain GET"""
+    import package_manager
+    monkeypatch.setattr(package_manager, "_RANGED_DOWNLOAD_MIN_SIZE", 1024)
+    body = demo_tar("1.0")
+    url = serve(server, "/demo.tar.gz", body, ranges="ignored")
+
+    file_path = manager.download_package(demo_package(url))
+    try:
+        with open(file_path, "rb") as f:
+            assert f.read() == body
+    finally:
+        os.unlink(file_path)
+        os.rmdir(os.path.dirname(file_path))
+
+    assert ("GET", None) in server.requests
+
+
+def test_download_rejects_short_body(server, manager):
+    """A single-stream download cut short of its Content-Length fails"""
+    body = demo_tar("1.0")
+    url = serve(server, "/demo.tar.gz", body, cut=len(body) // 2)
+
+    with pytest.raises(Exception):
+        manager.download_package(demo_package(url))
+
+
+def test_download_name_stays_in_temp_dir(server, manager):
+    """The Content-Disposition file name can't move the download out of its temp dir"""
+    url = serve(server, "/demo.tar.gz", demo_tar("1.0"),
+                headers={"Content-Disposition": 'attachment; filename="../../demo-1.0.tar.gz"'})
+
+    file_path = manager.download_package(demo_package(url))
+    try:
+        assert os.path.basename(file_path) == "demo-1.0.tar.gz"
+        # Directly in the mkdtemp() dir
+        assert os.path.dirname(os.path.dirname(file_path)) == tempfile.gettempdir()
+    finally:
+        os.unlink(file_path)
+        os.rmdir(os.path.dirname(file_path))
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-process archive extraction (tar --strip-components and .deb)
+"""
+
+import io
+import os
+import shutil
+import subprocess
+import tarfile
+
+import pytest
+
+
+def make_tar(members, compression="gz"):
+    """Build a tar archive from (name, kind, arg, attrs) tuples: kind is
+    'file' (arg = content), 'dir', 'hardlink' or 'symlink' (arg = link target)"""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=f"w:{compression}" if compression else "w") as tar:
+        for name, kind, arg, attrs in members:
+            info = tarfile.TarInfo(name)
+            for key, value in attrs.items():
+                setattr(info, key, value)
+            if kind == "file":
+                info.size = len(arg)
+                tar.addfile(info, io.BytesIO(arg))
+                continue
+            if kind == "dir":
+                info.type = tarfile.DIRTYPE
+            elif kind == "hardlink":
+                info.type = tarfile.LNKTYPE
+                info.linkname = arg
+            elif kind == "symlink":
+                info.type = tarfile.SYMTYPE
+                info.linkname = arg
+            tar.addfile(info)
+    return buffer.getvalue()
+
+
+def make_ar(members):
+    """Build an ar archive (the .deb container) from (name, data) pairs"""
+    out = b"!<arch>\n"
+    for name, data in members:
+        out += f"{name:<16}{0:<12}{0:<6}{0:<6}{'100644':<8}{len(data):<10}`\n".encode()
+        out += data + (b"\n" if len(data) % 2 else b"")
+    return out
+
+
+def make_deb(data_members, compression="gz", version="1.2.3"):
+    control = make_tar([("./control", "file", f"Package: demo\nVersion: {version}\n".encode(), {})])
+    if compression == "zst":
+        data = subprocess.run(["zstd", "-q", "-c"], input=make_tar(data_members, None),
+                              stdout=subprocess.PIPE, check=True).stdout
+    else:
+        data = make_tar(data_members, compression)
+    return make_ar([
+        ("debian-binary", b"2.0\n"),
+        ("control.tar.gz", control),
+        (f"data.tar.{compression}", data),
+    ])
+
+
+def extract_stripped(pm, archive, target_dir):
+    with tarfile.open(fileobj=io.BytesIO(archive), mode="r|gz") as tar:
+        pm._extract_tar_members(tar, target_dir, strip_components=1)
+
+
+def test_iter_ar_members(pm):
+    """Members come out in order, odd sizes are padded and unread data is skipped"""
+    archive = make_ar([("first", b"abc"), ("second", b"0123456789"), ("third", b"xyz!")])
+    seen = []
+    for name, reader in pm._iter_ar_members(io.BytesIO(archive)):
+        # Only read part of the second member, the rest must be skipped
+        seen.append((name, reader.read(4 if name == "second" else -1)))
+    assert seen == [("first", b"abc"), ("second", b"0123"), ("third", b"xyz!")]
+
+    with pytest.raises(Exception):
+        list(pm._iter_ar_members(io.BytesIO(b"not an archive")))
+
+
+@pytest.mark.parametrize("compression", ["gz", "xz", "bz2"])
+def test_extract_deb_stream(pm, tmp_path, compression):
+    """The data part is extracted and the control Version returned"""
+    deb = make_deb([
+        ("./usr/", "dir", None, {}),
+        ("./usr/bin/demo", "file", b"#!/bin/sh\n", {"mode": 0o755}),
+        ("./usr/bin/demo-link", "hardlink", "./usr/bin/demo", {"mode": 0o755}),
+        ("./usr/bin/demo-sym", "symlink", "/opt/demo/demo", {}),
+    ], compression)
+
+    assert pm._extract_deb_stream(io.BytesIO(deb), tmp_path) == "1.2.3"
+
+    demo = tmp_path / "usr" / "bin" / "demo"
+    assert demo.read_bytes() == b"#!/bin/sh\n"
+    assert os.stat(demo).st_mode & 0o777 == 0o755
+    assert os.path.samefile(demo, tmp_path / "usr" / "bin" / "demo-link")
+    # Absolute symlinks are kept as they are
+    assert os.readlink(tmp_path / "usr" / "bin" / "demo-sym") == "/opt/demo/demo"
+
+
+def test_extract_deb_zstd(pm, tmp_path):
+    """zstd .debs are unsupported in-process and go through dpkg-deb"""
+    if not (shutil.which("zstd") and shutil.which("dpkg-deb")):
+        pytest.skip("zstd and dpkg-deb are needed for this test")
+    from package_manager import UnsupportedArchiveError
+    deb = make_deb([("./opt/demo/demo", "file", b"zstd", {})], "zst", version="4.5.6")
+
+    with pytest.raises(UnsupportedArchiveError):
+        pm._extract_deb_stream(io.BytesIO(deb), tmp_path / "stream")
+
+    deb_file = tmp_path / "demo.deb"
+    deb_file.write_bytes(deb)
+    target_dir = tmp_path / "target"
+    target_dir.mkdir()
+    assert pm._extract_deb(str(deb_file), target_dir) == "4.5.6"
+    assert (target_dir / "opt" / "demo" / "demo").read_bytes() == b"zstd"
+
+
+def test_strip_components(pm, tmp_path):
+    """The top directory is dropped from names and hard link targets, like tar --strip-components=1"""
+    archive = make_tar([
+        ("./demo-1.0/", "dir", None, {}),
+        ("./demo-1.0/bin/demo", "file", b"binary", {"mode": 0o755}),
+        ("demo-1.0/bin/demo-copy", "hardlink", "./demo-1.0/bin/demo", {"mode": 0o755}),
+        ("demo-1.0/demo", "symlink", "bin/demo", {}),
+    ])
+    extract_stripped(pm, archive, tmp_path)
+
+    assert sorted(os.listdir(tmp_path)) == ["bin", "demo"]
+    assert (tmp_path / "bin" / "demo").read_bytes() == b"binary"
+    assert os.path.samefile(tmp_path / "bin" / "demo", tmp_path / "bin" / "demo-copy")
+    assert (tmp_path / "demo").resolve() == (tmp_path / "bin" / "demo").resolve()
+
+
+@pytest.mark.parametrize("members", [
+    [("pkg/a", "file", b"a", {}), ("pkg/../../escaped.txt", "file", b"x", {})],
+    [("pkg/escape", "hardlink", "pkg/../../outside.txt", {})],
+    [("pkg/up", "symlink", "..", {}), ("pkg/up/escaped.txt", "file", b"x", {})],
+], ids=["dotdot", "hardlink-dotdot", "through-symlink"])
+def test_rejects_members_outside_target(pm, tmp_path, members):
+    """Nothing is ever written outside the target directory"""
+    (tmp_path / "outside.txt").write_text("keep")
+    target_dir = tmp_path / "a" / "b"
+    target_dir.mkdir(parents=True)
+
+    with pytest.raises(Exception):
+        extract_stripped(pm, make_tar(members), target_dir)
+
+    assert sorted(os.listdir(tmp_path)) == ["a", "outside.txt"]
+    assert os.listdir(tmp_path / "a") == ["b"]
+    assert not (tmp_path / "a" / "escaped.txt").exists()
+
+
+def test_readonly_directories(pm, tmp_path):
+    """Read-only directories get their files, then their own mode and mtime"""
+    archive = make_tar([
+        ("pkg/", "dir", None, {}),
+        ("pkg/ro/", "dir", None, {"mode": 0o555, "mtime": 1000000}),
+        ("pkg/ro/sub/", "dir", None, {"mode": 0o555, "mtime": 1000000}),
+        ("pkg/ro/file", "file", b"1", {"mtime": 2000000}),
+        ("pkg/ro/sub/file", "file", b"2", {"mtime": 2000000}),
+    ])
+    try:
+        extract_stripped(pm, archive, tmp_path)
+
+        for directory in (tmp_path / "ro", tmp_path / "ro" / "sub"):
+            st = os.stat(directory)
+            assert st.st_mode & 0o777 == 0o555
+            assert int(st.st_mtime) == 1000000
+        assert (tmp_path / "ro" / "sub" / "file").read_bytes() == b"2"
+    finally:
+        # Let tmp_path be cleaned up
+        for directory in (tmp_path / "ro", tmp_path / "ro" / "sub"):
+            if directory.exists():
+                os.chmod(directory, 0o755)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the PATH blocks BenPak writes to and removes from shell config files
+"""
+
+import pytest
+
+
+RC = 'alias ll="ls -l"\nexport EDITOR=vim\n'
+
+
+@pytest.mark.parametrize("content, package_id, expected", [
+    # Only the package's own block goes, not the one of an id it prefixes
+    (RC + '\n# BenPak - code\nexport PATH="/p/code/bin:$PATH"\n'
+        '\n# BenPak - codeium\nexport PATH="/p/codeium/bin:$PATH"\n',
+     "code",
+     RC + '\n# BenPak - codeium\nexport PATH="/p/codeium/bin:$PATH"\n'),
+    (RC + '\n# BenPak - code\nexport PATH="/p/code/bin:$PATH"\n'
+        '\n# BenPak - codeium\nexport PATH="/p/codeium/bin:$PATH"\n',
+     "codeium",
+     RC + '\n# BenPak - code\nexport PATH="/p/code/bin:$PATH"\n'),
+    # Every copy of a duplicated block is removed
+    ('\n# BenPak - code\nexport PATH="/p/code/bin:$PATH"\n' + RC
+        + '\n# BenPak - code\nexport PATH="/p/code/bin:$PATH"\n',
+     "code",
+     RC),
+    # Block at the end of the file without a trailing newline
+    (RC + '\n# BenPak - code\nexport PATH="/p/code/bin:$PATH"',
+     "code",
+     RC),
+    # A marker without its export line: the next line is not BenPak's
+    (RC + '\n# BenPak - code\nalias code=codium\n',
+     "code",
+     RC + 'alias code=codium\n'),
+    # fish syntax
+    ('set -gx EDITOR vim\n\n# BenPak - code\nset -gx PATH "/p/code/bin" $PATH\n',
+     "code",
+     'set -gx EDITOR vim\n'),
+], ids=["prefix-id", "prefixed-id", "duplicates", "eof-no-newline", "marker-only", "fish"])
+def test_benpak_block_re(content, package_id, expected):
+    from package_manager import _benpak_block_re
+    assert _benpak_block_re(package_id).sub('', content) == expected
+
+
+def test_add_then_remove_restores_config(pm, tmp_path):
+    """Adding blocks for code and codeium then removing them gives back the original file"""
+    config_file = tmp_path / ".bashrc"
+    config_file.write_text(RC)
+
+    assert pm._add_app_path_to_shell_config(config_file, "code", "/p/code/bin", "bash")
+    assert pm._add_app_path_to_shell_config(config_file, "codeium", "/p/codeium/bin", "bash")
+    # Already there
+    assert not pm._add_app_path_to_shell_config(config_file, "code", "/p/code/bin", "bash")
+
+    assert pm._remove_app_path_from_shell_config(config_file, "code")
+    assert config_file.read_text() == RC + '\n# BenPak - codeium\nexport PATH="/p/codeium/bin:$PATH"\n'
+    # Nothing left for code
+    assert not pm._remove_app_path_from_shell_config(config_file, "code")
+
+    assert pm._remove_app_path_from_shell_config(config_file, "codeium")
+    assert config_file.read_text() == RC